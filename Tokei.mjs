@@ -874,7 +874,34 @@ async function renderHtmlAndPng({ statsJsonPath, htmlOutPath, pngOutPath }) {
   }
 }
 
+function getLemmaPythonCommand() {
+  // Same lookup as tokei_sync.py's external lemma builder: spaCy lives in .venv-lemmas.
+  const exe = process.env.TOKEI_PHASE2_PYTHON_EXE;
+  if (exe && exe.trim()) return exe.trim();
+  for (const base of [userRoot, appRoot]) {
+    const candidate = path.join(base, ".venv-lemmas", "Scripts", "python.exe");
+    if (fs.existsSync(candidate)) return candidate;
+  }
+  return null;
+}
+
+function runCoverage(args) {
+  // `tokei coverage <file|->`: prints known-word coverage JSON from tools/tokei_coverage.py.
+  const script = path.join(__dirname, "tools", "tokei_coverage.py");
+  const lemmaPy = getLemmaPythonCommand();
+  const cmd = lemmaPy || getPythonCommand();
+  const cmdArgs = lemmaPy ? [script, ...args] : [...getPythonArgsPrefix(), script, ...args];
+  // No cwd override: relative input paths are the user's, resolved against their shell directory.
+  const result = spawnSync(cmd, cmdArgs, { stdio: "inherit" });
+  if (result.error) throw result.error;
+  return typeof result.status === "number" ? result.status : 99;
+}
+
 async function main() {
+  if (process.argv[2] === "coverage") {
+    process.exitCode = runCoverage(process.argv.slice(3));
+    return;
+  }
   console.log(`Tokei v${APP_VERSION}`);
   const syncOnly = process.argv.includes("--sync-only");
   const noSync = process.argv.includes("--no-sync");
@@ -38,6 +38,8 @@ a = Analysis(
         "sqlite3",
         "_sqlite3",
         "tokei_errors",
+        "tokei_deinflect",
+        "tokei_lemma_common",
         "jinja2",
         "jinja2.environment",
         "jinja2.loaders",
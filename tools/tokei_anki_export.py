@@ -5,12 +5,14 @@ import json
 import os
 import re
 import sqlite3
+import sys
 import tempfile
 import unicodedata
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any
+from time import monotonic
+from typing import Any, Iterable, Iterator
 import shutil
 
 
@@ -32,6 +34,15 @@ class AnkiSnapshotConfig:
     rules: list[AnkiSnapshotRule]
 
 
+@dataclass(frozen=True)
+class _ResolvedRule:
+    rule: AnkiSnapshotRule
+    deck_ids: list[int]
+    # None when the rule has no note_types filter (every note type in its decks counts).
+    note_type_ids: list[int] | None
+    field_ord_by_mid: dict[int, int]
+
+
 def _utc_now_iso() -> str:
     return (
         datetime.now(tz=timezone.utc)
@@ -167,9 +178,9 @@ def _to_deck_path(storage_name: str) -> str:
     return str(storage_name or "").replace("\x1f", "::")
 
 
-def _connect_sqlite_ro(db_path: Path, *, busy_timeout_ms: int) -> sqlite3.Connection:
+def _connect_sqlite_ro(db_path: Path, *, busy_timeout_ms: int, immutable: bool = False) -> sqlite3.Connection:
     con = sqlite3.connect(
-        f"file:{db_path}?mode=ro",
+        f"file:{db_path}?mode=ro" + ("&immutable=1" if immutable else ""),
         uri=True,
         timeout=max(0.1, busy_timeout_ms / 1000.0),
     )
@@ -207,49 +218,182 @@ def _is_busy_error(exc: Exception) -> bool:
     )
 
 
-def _copy_collection_to_temp(collection_path: Path) -> Path:
-    tmp_dir = Path(tempfile.mkdtemp(prefix="tokei-anki-"))
-    dst = tmp_dir / collection_path.name
+_JOURNAL_MAGIC = bytes.fromhex("d9d505f920a163d7")
+
+
+def _has_pending_changes(collection_path: Path) -> bool:
+    """True when a WAL or a hot rollback journal may hold changes the main file lacks."""
+    try:
+        if collection_path.with_name(collection_path.name + "-wal").stat().st_size > 0:
+            return True
+    except OSError:
+        pass
+    try:
+        # Exclusive-locking connections keep the journal file around with a zeroed header
+        # after each commit; only a journal that still starts with the magic is hot.
+        with open(collection_path.with_name(collection_path.name + "-journal"), "rb") as f:
+            return f.read(len(_JOURNAL_MAGIC)) == _JOURNAL_MAGIC
+    except OSError:
+        return False
+
+
+def _collection_stamp(collection_path: Path) -> dict[str, list[int]]:
+    out: dict[str, list[int]] = {}
+    for suffix in ("", "-wal"):
+        try:
+            st = collection_path.with_name(collection_path.name + suffix).stat()
+        except OSError:
+            continue
+        out[suffix or "db"] = [int(st.st_size), int(st.st_mtime_ns)]
+    return out
+
+
+def _collection_cache_dir(collection_path: Path) -> Path:
+    key = hashlib.sha256(str(collection_path.resolve()).encode("utf-8")).hexdigest()[:16]
+    return Path(tempfile.gettempdir()) / "tokei-anki-cache" / key
+
+
+def _backup_collection_to(collection_path: Path, dst: Path, *, busy_timeout_ms: int) -> None:
+    src = _connect_sqlite_ro(collection_path, busy_timeout_ms=busy_timeout_ms)
+    deadline = monotonic() + busy_timeout_ms / 1000.0
+
+    def _give_up_when_locked(status: int, _remaining: int, _total: int) -> None:
+        # Connection.backup retries busy steps forever; bound it like any other wait.
+        if status in (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED) and monotonic() > deadline:
+            raise sqlite3.OperationalError("database is locked")
+
+    try:
+        out = sqlite3.connect(str(dst))
+        try:
+            src.backup(out, progress=_give_up_when_locked)
+            # A WAL-mode source leaves the WAL flag in the copied header; the cache is a single file.
+            out.execute("PRAGMA journal_mode=DELETE")
+        finally:
+            out.close()
+    finally:
+        src.close()
+
+
+def _copy_collection_to(collection_path: Path, dst: Path) -> None:
     shutil.copy2(collection_path, dst)
-    for suffix in ("-wal", "-shm"):
-        src_sidecar = collection_path.with_name(collection_path.name + suffix)
-        if src_sidecar.exists():
-            try:
-                shutil.copy2(src_sidecar, tmp_dir / src_sidecar.name)
-            except Exception:
-                pass
-    return dst
+    src_wal = collection_path.with_name(collection_path.name + "-wal")
+    if src_wal.exists():
+        try:
+            shutil.copy2(src_wal, dst.with_name(dst.name + "-wal"))
+        except Exception:
+            pass
+    # Fold the copied WAL into the main file (SQLite rebuilds the WAL index without -shm).
+    con = sqlite3.connect(str(dst))
+    try:
+        con.execute("PRAGMA journal_mode=DELETE")
+    finally:
+        con.close()
 
 
 class _CollectionDbRo:
+    """
+    Read-only connection to collection.anki2, with fallbacks for when Anki holds it locked:
+
+    1. a normal read-only open (WAL-aware; waits busy_timeout_ms);
+    2. an immutable=1 open of the file itself, when no WAL or hot journal holds pending changes;
+    3. a cached copy under the temp dir, reused while the collection's size/mtime (and its
+       WAL's) are unchanged, and refreshed with the SQLite backup API or, failing that, a file
+       copy.
+
+    The chosen path and how long it took are printed to stderr.
+    """
+
     def __init__(self, collection_path: Path, *, busy_timeout_ms: int):
         self._collection_path = collection_path
         self._busy_timeout_ms = int(busy_timeout_ms)
-        self._tmp_root: Path | None = None
+        self._tmp_path: Path | None = None
         self._con: sqlite3.Connection | None = None
 
+    def _open_checked(self, db_path: Path, *, immutable: bool = False) -> sqlite3.Connection:
+        con = _connect_sqlite_ro(db_path, busy_timeout_ms=self._busy_timeout_ms, immutable=immutable)
+        try:
+            con.execute("SELECT 1 FROM decks LIMIT 1").fetchone()
+        except sqlite3.Error:
+            con.close()
+            raise
+        return con
+
+    def _log(self, how: str, started: float) -> None:
+        print(f"Anki collection: {how} ({(monotonic() - started) * 1000.0:.0f} ms)", file=sys.stderr)
+
     def __enter__(self) -> sqlite3.Connection:
         self._con = None
-        self._tmp_root = None
+        self._tmp_path = None
+        started = monotonic()
 
         try:
-            con = _connect_sqlite_ro(self._collection_path, busy_timeout_ms=self._busy_timeout_ms)
-            con.execute("SELECT 1 FROM decks LIMIT 1").fetchone()
-            self._con = con
-            return con
+            self._con = self._open_checked(self._collection_path)
+            self._log("opened read-only", started)
+            return self._con
         except sqlite3.Error as e:
-            try:
-                con.close()  # type: ignore[has-type]
-            except Exception:
-                pass
             if not _is_busy_error(e):
                 raise
 
-        copied_path = _copy_collection_to_temp(self._collection_path)
-        self._tmp_root = copied_path.parent
-        con2 = _connect_sqlite_ro(copied_path, busy_timeout_ms=self._busy_timeout_ms)
-        self._con = con2
-        return con2
+        path = self._collection_path
+        # immutable=1 skips locking and ignores WAL/journal files, so it is only safe when
+        # neither holds pending changes.
+        if not _has_pending_changes(path):
+            try:
+                self._con = self._open_checked(path, immutable=True)
+                self._log("collection busy; opened immutable", started)
+                return self._con
+            except sqlite3.Error:
+                pass
+
+        cache_dir = _collection_cache_dir(path)
+        cache_db = cache_dir / path.name
+        stamp_path = cache_dir / "stamp.json"
+        stamp = _collection_stamp(path)
+        try:
+            cached_stamp = json.loads(stamp_path.read_text(encoding="utf-8"))
+        except Exception:
+            cached_stamp = None
+        if cached_stamp == {"source": str(path), "files": stamp} and cache_db.exists():
+            try:
+                self._con = self._open_checked(cache_db)
+                self._log("collection busy; reused cached copy", started)
+                return self._con
+            except sqlite3.Error:
+                pass
+
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(prefix=".tokei-", suffix=".anki2", dir=str(cache_dir))
+        os.close(fd)
+        tmp_path = Path(tmp_name)
+        try:
+            try:
+                _backup_collection_to(path, tmp_path, busy_timeout_ms=self._busy_timeout_ms)
+                how = "collection busy; refreshed cached copy (backup API)"
+            except sqlite3.Error:
+                tmp_path.unlink(missing_ok=True)
+                _copy_collection_to(path, tmp_path)
+                how = "collection busy; refreshed cached copy (file copy)"
+            try:
+                os.replace(tmp_path, cache_db)
+            except OSError:
+                # Another export still has the previous copy open (Windows): use this one once.
+                self._tmp_path = tmp_path
+            else:
+                if _collection_stamp(path) == stamp:
+                    _json_dump_atomic(stamp_path, {"source": str(path), "files": stamp})
+                else:
+                    stamp_path.unlink(missing_ok=True)
+        except Exception:
+            for leftover in (tmp_path, tmp_path.with_name(tmp_path.name + "-wal")):
+                try:
+                    leftover.unlink(missing_ok=True)
+                except OSError:
+                    pass
+            raise
+
+        self._con = _connect_sqlite_ro(self._tmp_path or cache_db, busy_timeout_ms=self._busy_timeout_ms)
+        self._log(how, started)
+        return self._con
 
     def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> bool:
         try:
@@ -259,19 +403,197 @@ class _CollectionDbRo:
                 except Exception:
                     pass
         finally:
-            if self._tmp_root is not None:
+            if self._tmp_path is not None:
                 try:
-                    shutil.rmtree(self._tmp_root, ignore_errors=True)
+                    self._tmp_path.unlink(missing_ok=True)
                 except Exception:
                     pass
         return False
 
 
-def _resolve_deck_ids(con: sqlite3.Connection, deck_paths: list[str], include_subdecks: bool) -> list[int]:
+@dataclass(frozen=True)
+class _CollectionMeta:
+    decks: list[tuple[int, str]]
+    note_types: list[tuple[int, str]]
+    # ntid -> [(ord, name)], in field order.
+    fields: dict[int, list[tuple[int, str]]]
+    # Only loaded for discover; None otherwise.
+    note_type_ids_by_deck: dict[int, list[int]] | None
+
+
+# Bump when the metadata.json layout changes.
+_COLLECTION_META_VERSION = 2
+# Card ids are folded modulo this prime into a checksum that fits SQLite's 64-bit SUM.
+_CARD_ID_CHECKSUM_MOD = 2147483647
+
+
+def _load_collection_meta_cache(collection_path: Path) -> dict[str, Any]:
+    try:
+        cache = json.loads((_collection_cache_dir(collection_path) / "metadata.json").read_text(encoding="utf-8"))
+    except Exception:
+        return {}
+    if not isinstance(cache, dict):
+        return {}
+    if cache.get("version") != _COLLECTION_META_VERSION or cache.get("source") != str(collection_path):
+        return {}
+    return cache
+
+
+def _meta_from_cache(cache: dict[str, Any], *, with_note_types_by_deck: bool) -> _CollectionMeta:
+    by_deck: dict[int, list[int]] | None = None
+    if with_note_types_by_deck:
+        by_deck = {int(did): [int(m) for m in mids] for did, mids in (cache.get("note_types_by_deck") or {}).items()}
+    return _CollectionMeta(
+        decks=[(int(did), str(name)) for did, name in cache["decks"]],
+        note_types=[(int(mid), str(name)) for mid, name in cache["note_types"]],
+        fields={int(ntid): [(int(o), str(n)) for o, n in flds] for ntid, flds in cache["fields"].items()},
+        note_type_ids_by_deck=by_deck,
+    )
+
+
+def _cached_collection_meta(
+    collection_path: Path,
+    stamp: dict[str, list[int]],
+    *,
+    with_note_types_by_deck: bool,
+) -> _CollectionMeta | None:
+    """Metadata from the cache when the collection file is unchanged since it was written."""
+    cache = _load_collection_meta_cache(collection_path)
+    if cache.get("files") != stamp or "decks" not in cache:
+        return None
+    if with_note_types_by_deck and cache.get("by_deck_files") != stamp:
+        return None
+    return _meta_from_cache(cache, with_note_types_by_deck=with_note_types_by_deck)
+
+
+def _add_note_types_by_deck(con: sqlite3.Connection, by_deck: dict[str, set[int]], *, since_mod: int) -> int:
+    """Adds the (deck, note type) pairs of cards modified at or after since_mod; returns the newest card mod."""
+    cards_mod = since_mod
+    # cards.mod has one-second resolution: re-read the watermark second rather than miss it.
+    for did, mid, mod in con.execute(
+        """
+        SELECT c.did, n.mid, MAX(c.mod)
+        FROM cards c
+        JOIN notes n ON n.id = c.nid
+        WHERE c.mod >= ?
+        GROUP BY c.did, n.mid
+        """,
+        (since_mod,),
+    ):
+        by_deck.setdefault(str(int(did)), set()).add(int(mid))
+        cards_mod = max(cards_mod, int(mod or 0))
+    return cards_mod
+
+
+def _collection_meta(
+    con: sqlite3.Connection,
+    collection_path: Path,
+    stamp: dict[str, list[int]],
+    *,
+    with_note_types_by_deck: bool,
+) -> _CollectionMeta:
+    """
+    Decks, note types and fields (plus, for discover, the note types used in each deck), cached
+    in metadata.json next to the collection's cached copy.
+
+    stamp is the collection's size/mtime taken before reading. The small tables are re-read when
+    it changed. The deck -> note type map is the expensive part (cards JOIN notes): while the
+    schema modification time (col.scm) is unchanged and every card present at the last refresh
+    still is (count and id checksum of that id range), it is only extended with cards modified
+    since then. If col.mod moved past the newest card change that scan saw, something it cannot
+    see changed (deletions, note edits, a sync bringing older card mods), and the map is rebuilt.
+    A deck can still keep listing a note type whose last card moved elsewhere until then.
+    """
+    cache = _load_collection_meta_cache(collection_path)
+    changed = False
+
+    if cache.get("files") != stamp or "decks" not in cache:
+        deck_rows = con.execute("SELECT id, name FROM decks ORDER BY name").fetchall()
+        nt_rows = con.execute("SELECT id, name FROM notetypes ORDER BY name").fetchall()
+        fields_rows = con.execute("SELECT ntid, ord, name FROM fields ORDER BY ntid, ord").fetchall()
+        fields: dict[str, list[list[Any]]] = {}
+        for ntid, ord_, fname in fields_rows:
+            fields.setdefault(str(int(ntid)), []).append([int(ord_), str(fname or "")])
+        cache.update(
+            {
+                "version": _COLLECTION_META_VERSION,
+                "source": str(collection_path),
+                "files": stamp,
+                "decks": [[int(did), str(name or "")] for did, name in deck_rows],
+                "note_types": [[int(mid), str(name or "")] for mid, name in nt_rows],
+                "fields": fields,
+            }
+        )
+        changed = True
+
+    if with_note_types_by_deck and cache.get("by_deck_files") != stamp:
+        try:
+            col_row = con.execute("SELECT scm, mod FROM col").fetchone()
+            scm = int(col_row[0]) if col_row and col_row[0] is not None else None
+            col_mod = int(col_row[1]) if col_row and col_row[1] is not None else None
+        except sqlite3.Error:
+            scm = col_mod = None
+        prev_max_id = int(cache.get("cards_max_id") or 0)
+        cards_count, cards_max_id, cards_id_sum, kept_count, kept_id_sum = con.execute(
+            """
+            SELECT
+              COUNT(*), MAX(id), SUM(id % :m),
+              SUM(id <= :prev_max), SUM(CASE WHEN id <= :prev_max THEN id % :m ELSE 0 END)
+            FROM cards
+            """,
+            {"m": _CARD_ID_CHECKSUM_MOD, "prev_max": prev_max_id},
+        ).fetchone()
+        incremental = (
+            scm is not None
+            and cache.get("scm") == scm
+            and isinstance(cache.get("note_types_by_deck"), dict)
+            and cache.get("cards_count") == int(kept_count or 0)
+            and cache.get("cards_id_sum") == int(kept_id_sum or 0)
+        )
+        by_deck: dict[str, set[int]] = {}
+        cards_mod = 0
+        if incremental:
+            by_deck = {str(did): set(int(m) for m in mids) for did, mids in cache["note_types_by_deck"].items()}
+            cards_mod = _add_note_types_by_deck(con, by_deck, since_mod=int(cache.get("cards_mod") or 0))
+            # col.mod is in milliseconds, cards.mod in seconds.
+            if col_mod is not None and cache.get("col_mod") != col_mod and col_mod // 1000 > cards_mod:
+                incremental = False
+        if not incremental:
+            by_deck = {}
+            cards_mod = _add_note_types_by_deck(con, by_deck, since_mod=0)
+        cache.update(
+            {
+                "by_deck_files": stamp,
+                "scm": scm,
+                "col_mod": col_mod,
+                "cards_count": int(cards_count or 0),
+                "cards_max_id": int(cards_max_id or 0),
+                "cards_id_sum": int(cards_id_sum or 0),
+                "cards_mod": cards_mod,
+                "note_types_by_deck": {did: sorted(mids) for did, mids in by_deck.items()},
+            }
+        )
+        changed = True
+
+    if changed:
+        try:
+            _json_dump_atomic(_collection_cache_dir(collection_path) / "metadata.json", cache)
+        except OSError:
+            pass
+    return _meta_from_cache(cache, with_note_types_by_deck=with_note_types_by_deck)
+
+
+def _resolve_deck_ids(
+    con: sqlite3.Connection,
+    deck_paths: list[str],
+    include_subdecks: bool,
+    *,
+    meta: _CollectionMeta | None = None,
+) -> list[int]:
     if not deck_paths:
         return []
     want_storage = [p.replace("::", "\x1f") for p in deck_paths]
-    rows = con.execute("SELECT id, name FROM decks ORDER BY id").fetchall()
+    rows = meta.decks if meta is not None else con.execute("SELECT id, name FROM decks ORDER BY id").fetchall()
     want: list[int] = []
     for did, name in rows:
         name_s = str(name or "")
@@ -286,18 +608,46 @@ def _resolve_deck_ids(con: sqlite3.Connection, deck_paths: list[str], include_su
                 break
     return sorted(set(want))
 
-def _resolve_note_type_ids(con: sqlite3.Connection, note_types: list[str]) -> list[int]:
+def _resolve_note_type_ids(
+    con: sqlite3.Connection,
+    note_types: list[str],
+    *,
+    meta: _CollectionMeta | None = None,
+) -> list[int]:
     out: list[int] = []
     for nt in note_types:
+        if meta is not None:
+            # notetypes.name uses Anki's case-insensitive "unicase" collation.
+            want = str(nt).casefold()
+            match = next((mid for mid, name in meta.note_types if name.casefold() == want), None)
+            if match is not None:
+                out.append(int(match))
+            continue
         row = con.execute("SELECT id FROM notetypes WHERE name=? LIMIT 1", (str(nt),)).fetchone()
         if row and row[0] is not None:
             out.append(int(row[0]))
     return sorted(set(out))
 
 
-def _field_ord_by_mid(con: sqlite3.Connection, mids: list[int], field_name: str) -> dict[int, int]:
+def _field_ord_by_mid(
+    con: sqlite3.Connection,
+    mids: list[int],
+    field_name: str,
+    *,
+    meta: _CollectionMeta | None = None,
+) -> dict[int, int]:
     if not mids:
         return {}
+    if meta is not None:
+        # fields.name is "unicase" too.
+        want = str(field_name).casefold()
+        out: dict[int, int] = {}
+        for mid in mids:
+            for ord_, fname in meta.fields.get(int(mid), []):
+                if fname.casefold() == want:
+                    out[int(mid)] = int(ord_)
+                    break
+        return out
     placeholders = ",".join("?" for _ in mids)
     rows = con.execute(
         f"SELECT ntid, ord FROM fields WHERE ntid IN ({placeholders}) AND name=?",
@@ -320,208 +670,571 @@ def _ensure_known_words_schema(con: sqlite3.Connection) -> None:
         )
         """
     )
+    # Tokei's Phase 2 import now reads changes through lexeme_presence instead.
+    con.execute("DROP INDEX IF EXISTS idx_lexemes_last_seen")
+    con.execute(
+        """
+        CREATE TABLE IF NOT EXISTS snapshot_dates (
+          snapshot_date DATE PRIMARY KEY
+        )
+        """
+    )
+    # One row per stretch of consecutive snapshots a lexeme was in; to_date is NULL while it is
+    # still in the latest snapshot, so unchanged lexemes need no write when a snapshot is added.
     con.execute(
         """
-        CREATE TABLE IF NOT EXISTS lexeme_snapshots (
+        CREATE TABLE IF NOT EXISTS lexeme_presence (
           lexeme_id INTEGER NOT NULL,
-          snapshot_date DATE NOT NULL,
-          PRIMARY KEY (lexeme_id, snapshot_date)
+          from_date DATE NOT NULL,
+          to_date DATE,
+          PRIMARY KEY (lexeme_id, from_date)
         )
         """
     )
+    con.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_lexeme_presence_open ON lexeme_presence(lexeme_id) WHERE to_date IS NULL"
+    )
+    con.execute("CREATE INDEX IF NOT EXISTS idx_lexeme_presence_dates ON lexeme_presence(from_date, to_date)")
+    # With the from_date index, lets readers range-scan the intervals opened or closed since a date.
+    con.execute("CREATE INDEX IF NOT EXISTS idx_lexeme_presence_to_date ON lexeme_presence(to_date)")
 
+    row = con.execute("SELECT type FROM sqlite_master WHERE name = 'lexeme_snapshots'").fetchone()
+    if row and row[0] == "table":
+        _migrate_lexeme_snapshots(con)
+    con.execute(
+        """
+        CREATE VIEW IF NOT EXISTS lexeme_snapshots AS
+        SELECT p.lexeme_id AS lexeme_id, d.snapshot_date AS snapshot_date
+        FROM lexeme_presence p
+        JOIN snapshot_dates d
+          ON d.snapshot_date >= p.from_date
+         AND (p.to_date IS NULL OR d.snapshot_date <= p.to_date)
+        """
+    )
+    # lexemes.last_seen is only written when a lexeme appears or drops out; a lexeme with an open
+    # interval is in the latest snapshot, so its effective last_seen is that date.
+    con.execute(
+        """
+        CREATE VIEW IF NOT EXISTS lexemes_current AS
+        SELECT
+          l.id AS id,
+          l.content_key AS content_key,
+          l.surface AS surface,
+          l.normalized_surface AS normalized_surface,
+          l.rule_id AS rule_id,
+          l.first_seen AS first_seen,
+          CASE
+            WHEN p.lexeme_id IS NULL THEN l.last_seen
+            ELSE (SELECT MAX(snapshot_date) FROM snapshot_dates)
+          END AS last_seen,
+          p.lexeme_id IS NOT NULL AS present
+        FROM lexemes l
+        LEFT JOIN lexeme_presence p ON p.lexeme_id = l.id AND p.to_date IS NULL
+        """
+    )
 
-def _phase1_process_lexemes(
-    con: sqlite3.Connection,
-    *,
-    raw_rows: list[str],
-    rule_id: str,
-    snapshot_date: str,
-) -> int:
-    _ensure_known_words_schema(con)
-    inserted = 0
+
+def _migrate_lexeme_snapshots(con: sqlite3.Connection) -> None:
+    """Compacts the old per-day lexeme_snapshots table into lexeme_presence intervals (once)."""
     con.execute("BEGIN")
     try:
-        for surface in raw_rows:
-            normalized = _normalize_surface_for_identity(surface)
-            if not normalized:
-                continue
-            content_key = _content_key_for_lexeme(normalized, rule_id)
-            row = con.execute(
-                """
-                INSERT INTO lexemes (
-                  content_key, surface, normalized_surface, rule_id, first_seen, last_seen
-                )
-                VALUES (?, ?, ?, ?, ?, ?)
-                ON CONFLICT(content_key) DO UPDATE SET
-                  last_seen = excluded.last_seen
-                RETURNING id
-                """,
-                (content_key, surface, normalized, rule_id, snapshot_date, snapshot_date),
-            ).fetchone()
-            if not row:
-                raise RuntimeError("Failed to upsert lexeme row")
-            lexeme_id = int(row[0])
-            con.execute(
-                """
-                INSERT OR IGNORE INTO lexeme_snapshots(lexeme_id, snapshot_date)
-                VALUES(?, ?)
-                """,
-                (lexeme_id, snapshot_date),
+        con.execute(
+            "INSERT OR IGNORE INTO snapshot_dates(snapshot_date) SELECT DISTINCT snapshot_date FROM lexeme_snapshots"
+        )
+        # Gaps-and-islands: a lexeme's snapshots are consecutive when their position among all
+        # snapshot dates advances in step with their position among its own dates.
+        con.execute(
+            """
+            WITH d AS (
+              SELECT snapshot_date, ROW_NUMBER() OVER (ORDER BY snapshot_date) AS pos
+              FROM snapshot_dates
+            ),
+            s AS (
+              SELECT
+                ls.lexeme_id,
+                ls.snapshot_date,
+                d.pos - ROW_NUMBER() OVER (PARTITION BY ls.lexeme_id ORDER BY ls.snapshot_date) AS island
+              FROM lexeme_snapshots ls
+              JOIN d ON d.snapshot_date = ls.snapshot_date
             )
-            inserted += 1
+            INSERT OR IGNORE INTO lexeme_presence(lexeme_id, from_date, to_date)
+            SELECT
+              lexeme_id,
+              MIN(snapshot_date),
+              CASE
+                WHEN MAX(snapshot_date) = (SELECT MAX(snapshot_date) FROM snapshot_dates) THEN NULL
+                ELSE MAX(snapshot_date)
+              END
+            FROM s
+            GROUP BY lexeme_id, island
+            """
+        )
+        con.execute("DROP TABLE lexeme_snapshots")
         con.commit()
-        return inserted
     except Exception:
         try:
             con.rollback()
         except Exception:
             pass
         raise
+    # Hand the per-day rows' pages back to the filesystem.
+    con.execute("VACUUM")
 
 
-def _mature_lexeme_surfaces(
-    con: sqlite3.Connection,
+def _write_known_lexemes(
+    kw_con: sqlite3.Connection,
+    lexemes: Iterable[tuple[str, str]],
     *,
-    deck_ids: list[int],
-    note_type_ids: list[int] | None,
-    field_ord_by_mid: dict[int, int],
-    mature_interval_days: int,
-) -> list[str]:
-    if not deck_ids:
-        return []
-    did_placeholders = ",".join("?" for _ in deck_ids)
-    params: list[Any] = [*deck_ids, int(mature_interval_days)]
+    snapshot_date: str,
+) -> tuple[int, int]:
+    """
+    Makes snapshot_date's known set the given (rule_id, surface) pairs, writing only the
+    difference from the latest snapshot.
+
+    Lexemes that appeared are upserted (last_seen = snapshot_date) and get an open presence
+    interval (or have yesterday's reopened after a same-day flip). Lexemes that dropped out
+    have their interval closed at the previous snapshot date, which also becomes their
+    last_seen. Unchanged lexemes are not touched: their open interval already says they are
+    in the latest snapshot (see the lexemes_current view).
+    Returns (added, removed).
+    """
+    _ensure_known_words_schema(kw_con)
+
+    current: dict[str, tuple[str, str, str]] = {}
+    for rule_id, surface in lexemes:
+        normalized = _normalize_surface_for_identity(surface)
+        if not normalized:
+            continue
+        content_key = _content_key_for_lexeme(normalized, rule_id)
+        if content_key not in current:
+            current[content_key] = (surface, normalized, rule_id)
+
+    previous: dict[str, int] = {
+        str(content_key): int(lexeme_id)
+        for content_key, lexeme_id in kw_con.execute(
+            """
+            SELECT l.content_key, l.id
+            FROM lexeme_presence p
+            JOIN lexemes l ON l.id = p.lexeme_id
+            WHERE p.to_date IS NULL
+            """
+        )
+    }
+    before_row = kw_con.execute(
+        "SELECT MAX(snapshot_date) FROM snapshot_dates WHERE snapshot_date < ?", (snapshot_date,)
+    ).fetchone()
+    last_before = str(before_row[0]) if before_row and before_row[0] else None
+    added = [(k, v) for k, v in current.items() if k not in previous]
+    removed_ids = [lexeme_id for k, lexeme_id in previous.items() if k not in current]
 
-    mid_filter = ""
-    if note_type_ids:
-        mid_placeholders = ",".join("?" for _ in note_type_ids)
-        mid_filter = f" AND n.mid IN ({mid_placeholders})"
-        params.extend([int(m) for m in note_type_ids])
+    kw_con.execute("BEGIN")
+    try:
+        kw_con.execute("INSERT OR IGNORE INTO snapshot_dates(snapshot_date) VALUES(?)", (snapshot_date,))
 
-    rows = con.execute(
+        # An interval opened today (earlier same-day export) covers no other snapshot: drop it.
+        kw_con.executemany(
+            "DELETE FROM lexeme_presence WHERE lexeme_id = ? AND to_date IS NULL AND from_date >= ?",
+            [(lexeme_id, snapshot_date) for lexeme_id in removed_ids],
+        )
+        kw_con.executemany(
+            "UPDATE lexeme_presence SET to_date = ? WHERE lexeme_id = ? AND to_date IS NULL",
+            [(last_before, lexeme_id) for lexeme_id in removed_ids],
+        )
+        kw_con.executemany(
+            """
+            UPDATE lexemes
+            SET last_seen = COALESCE(
+              (SELECT MAX(p.to_date) FROM lexeme_presence p WHERE p.lexeme_id = lexemes.id),
+              last_seen
+            )
+            WHERE id = ?
+            """,
+            [(lexeme_id,) for lexeme_id in removed_ids],
+        )
+
+        kw_con.executemany(
+            """
+            INSERT INTO lexemes (
+              content_key, surface, normalized_surface, rule_id, first_seen, last_seen
+            )
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(content_key) DO UPDATE SET
+              last_seen = excluded.last_seen
+            """,
+            [
+                (content_key, surface, normalized, rule_id, snapshot_date, snapshot_date)
+                for content_key, (surface, normalized, rule_id) in added
+            ],
+        )
+        if last_before is not None:
+            # Dropped by an earlier export today but back again: still present since then.
+            kw_con.executemany(
+                """
+                UPDATE lexeme_presence SET to_date = NULL
+                WHERE to_date = ?
+                  AND lexeme_id = (SELECT id FROM lexemes WHERE content_key = ?)
+                """,
+                [(last_before, content_key) for content_key, _row in added],
+            )
+        kw_con.executemany(
+            """
+            INSERT INTO lexeme_presence(lexeme_id, from_date, to_date)
+            SELECT l.id, ?, NULL
+            FROM lexemes l
+            WHERE l.content_key = ?
+              AND NOT EXISTS (
+                SELECT 1 FROM lexeme_presence p WHERE p.lexeme_id = l.id AND p.to_date IS NULL
+              )
+            """,
+            [(snapshot_date, content_key) for content_key, _row in added],
+        )
+        kw_con.commit()
+    except Exception:
+        try:
+            kw_con.rollback()
+        except Exception:
+            pass
+        raise
+    return len(added), len(removed_ids)
+
+
+def _mature_lexemes(
+    con: sqlite3.Connection,
+    *,
+    rules: list[_ResolvedRule],
+) -> Iterator[tuple[int, str]]:
+    """
+    Yields (rule index, target-field surface) once per note with a mature card in that rule.
+
+    One cards JOIN notes cursor over the union of the rules' decks, in card order; each row
+    is dispatched to the rules whose decks, note types and mature interval match. Only the
+    fields up to the target field are split off flds.
+    """
+    all_deck_ids = sorted({int(d) for r in rules for d in r.deck_ids})
+    if not all_deck_ids:
+        return
+    did_placeholders = ",".join("?" for _ in all_deck_ids)
+    min_ivl = min(int(r.rule.mature_interval_days) for r in rules)
+
+    matchers = [
+        (
+            idx,
+            set(r.deck_ids),
+            set(r.note_type_ids) if r.note_type_ids is not None else None,
+            int(r.rule.mature_interval_days),
+            r.field_ord_by_mid,
+            set(),
+        )
+        for idx, r in enumerate(rules)
+    ]
+    cur = con.execute(
         f"""
-        SELECT n.mid, n.flds
+        SELECT c.did, c.ivl, n.id, n.mid, n.flds
         FROM cards c
         JOIN notes n ON n.id = c.nid
         WHERE c.did IN ({did_placeholders})
           AND c.ivl >= ?
-          {mid_filter}
         ORDER BY c.id
         """,
-        params,
-    ).fetchall()
-    out: list[str] = []
-    for mid, flds in rows:
+        (*all_deck_ids, min_ivl),
+    )
+    for did, ivl, nid, mid, flds in cur:
+        did_i = int(did)
+        ivl_i = int(ivl)
         mid_i = int(mid)
-        field_ord = field_ord_by_mid.get(mid_i)
-        if field_ord is None:
-            continue
-        flds_s = flds if isinstance(flds, str) else ""
-        parts = flds_s.split("\x1f")
-        surface = parts[field_ord] if 0 <= field_ord < len(parts) else ""
-        out.append(str(surface or "").strip())
-    return out
+        for idx, deck_ids, mids, mature_ivl, field_ord_by_mid, seen_nids in matchers:
+            if did_i not in deck_ids or ivl_i < mature_ivl or (mids is not None and mid_i not in mids):
+                continue
+            field_ord = field_ord_by_mid.get(mid_i)
+            if field_ord is None or nid in seen_nids:
+                continue
+            seen_nids.add(nid)
+            flds_s = flds if isinstance(flds, str) else ""
+            parts = flds_s.split("\x1f", field_ord + 1)
+            surface = parts[field_ord] if 0 <= field_ord < len(parts) else ""
+            yield idx, str(surface or "").strip()
 
 
-def _distinct_note_type_ids_in_decks(con: sqlite3.Connection, deck_ids: list[int]) -> list[int]:
+def _note_type_ids_by_deck(con: sqlite3.Connection, deck_ids: list[int]) -> dict[int, set[int]]:
     if not deck_ids:
-        return []
+        return {}
     did_placeholders = ",".join("?" for _ in deck_ids)
     rows = con.execute(
         f"""
-        SELECT DISTINCT n.mid
+        SELECT DISTINCT c.did, n.mid
         FROM cards c
         JOIN notes n ON n.id = c.nid
         WHERE c.did IN ({did_placeholders})
         """,
         (*[int(d) for d in deck_ids],),
     ).fetchall()
-    return sorted({int(mid) for (mid,) in rows if mid is not None})
+    out: dict[int, set[int]] = {}
+    for did, mid in rows:
+        if did is not None and mid is not None:
+            out.setdefault(int(did), set()).add(int(mid))
+    return out
 
 
-def _count_true_reviews(
-    con: sqlite3.Connection,
-    *,
-    deck_ids: list[int],
-    start_ms: int | None,
-    end_ms: int,
-    mature_interval_days: int,
-) -> tuple[int, int, int | None]:
-    if not deck_ids:
-        return 0, 0, None
+# Bump when card_reviews changes shape or meaning; older side databases are rebuilt from revlog.
+_REVIEW_STATS_VERSION = 1
 
-    did_placeholders = ",".join("?" for _ in deck_ids)
-    params: list[Any] = [*deck_ids, int(mature_interval_days)]
+_REVIEW_STATS_UPSERT_SQL = """
+INSERT INTO card_reviews (cid, true_correct, true_total, revlog_rows, first_true_review_id)
+VALUES (?, ?, ?, ?, ?)
+ON CONFLICT(cid) DO UPDATE SET
+  true_correct = true_correct + excluded.true_correct,
+  true_total = true_total + excluded.true_total,
+  revlog_rows = revlog_rows + excluded.revlog_rows,
+  first_true_review_id = CASE
+    WHEN excluded.first_true_review_id IS NULL THEN first_true_review_id
+    WHEN first_true_review_id IS NULL THEN excluded.first_true_review_id
+    ELSE MIN(first_true_review_id, excluded.first_true_review_id)
+  END
+"""
 
-    time_filter = ""
-    if start_ms is not None:
-        time_filter = " AND r.id >= ? AND r.id <= ?"
-        params.extend([int(start_ms), int(end_ms)])
 
-    row = con.execute(
-        f"""
+def _ensure_review_stats_schema(con: sqlite3.Connection) -> None:
+    con.execute(
+        """
+        CREATE TABLE IF NOT EXISTS meta (
+          key TEXT PRIMARY KEY,
+          value TEXT NOT NULL
+        )
+        """
+    )
+    # Per-card rather than per-rule: the rule filters (c.did, c.ivl) are read from the live
+    # cards table at export time, so cards that mature, lapse or move decks never leave
+    # stale totals behind.
+    con.execute(
+        """
+        CREATE TABLE IF NOT EXISTS card_reviews (
+          cid INTEGER PRIMARY KEY,
+          true_correct INTEGER NOT NULL,
+          true_total INTEGER NOT NULL,
+          revlog_rows INTEGER NOT NULL,
+          first_true_review_id INTEGER
+        )
+        """
+    )
+
+
+def _apply_revlog_range(
+    con: sqlite3.Connection,
+    stats_con: sqlite3.Connection,
+    *,
+    first_id: int,
+    last_id: int,
+    sign: int,
+) -> None:
+    # revlog.id is the rowid, so this is a range scan over the new (or expired) reviews only.
+    cur = con.execute(
+        """
         SELECT
-          SUM(CASE WHEN r.ease != 1 THEN 1 ELSE 0 END) AS correct,
-          COUNT(*) AS total
+          r.cid,
+          SUM(CASE WHEN r.type = 1 AND r.ease != 1 THEN 1 ELSE 0 END),
+          SUM(CASE WHEN r.type = 1 THEN 1 ELSE 0 END),
+          COUNT(*),
+          MIN(CASE WHEN r.type = 1 THEN r.id END)
         FROM revlog r
-        JOIN cards c ON c.id = r.cid
-        WHERE r.type = 1
-          AND c.did IN ({did_placeholders})
-          AND c.ivl >= ?
-          {time_filter}
+        WHERE r.id >= ? AND r.id <= ?
+        GROUP BY r.cid
         """,
-        params,
-    ).fetchone()
-    correct = int(row[0] or 0) if row else 0
-    total = int(row[1] or 0) if row else 0
-
-    used_start_ms: int | None
-    if start_ms is not None:
-        used_start_ms = int(start_ms)
-    else:
-        min_row = con.execute(
-            f"""
-            SELECT MIN(r.id)
-            FROM revlog r
-            JOIN cards c ON c.id = r.cid
-            WHERE r.type = 1
-              AND c.did IN ({did_placeholders})
-              AND c.ivl >= ?
-            """,
-            params,
-        ).fetchone()
-        used_start_ms = int(min_row[0]) if min_row and min_row[0] is not None else None
-
-    return total, correct, used_start_ms
+        (int(first_id), int(last_id)),
+    )
+    # Subtracting leaves first_true_review_id as is; it is only read for the all-time range,
+    # which starts at 0 and so has every subtracted review added back.
+    stats_con.executemany(
+        _REVIEW_STATS_UPSERT_SQL,
+        (
+            (int(cid), sign * int(correct or 0), sign * int(total or 0), sign * int(rows or 0), first if sign > 0 else None)
+            for cid, correct, total, rows, first in cur
+        ),
+    )
 
 
-def _count_cards_studied(
+def _sync_review_stats(
     con: sqlite3.Connection,
+    stats_con: sqlite3.Connection,
     *,
-    deck_ids: list[int],
+    collection_key: str,
     start_ms: int | None,
     end_ms: int,
-) -> int:
-    if not deck_ids:
-        return 0
-    did_placeholders = ",".join("?" for _ in deck_ids)
-    params: list[Any] = [*deck_ids]
-    time_filter = ""
-    if start_ms is not None:
-        time_filter = " AND r.id >= ? AND r.id <= ?"
-        params.extend([int(start_ms), int(end_ms)])
-    row = con.execute(
+) -> None:
+    """
+    Brings card_reviews up to date with revlog rows in [start_ms, end_ms].
+
+    The side database remembers the revlog id range it covers and how many revlog rows had
+    an id at or below its upper bound. If that count no longer matches (reviews deleted, or
+    older reviews arriving from a sync) or the collection changed, it is rebuilt; otherwise
+    only reviews that entered or left the range are read. Counting revlog is a full scan, so
+    it only runs when col.mod or the newest revlog id moved since the last export.
+    """
+    _ensure_review_stats_schema(stats_con)
+    state = {str(k): str(v) for k, v in stats_con.execute("SELECT key, value FROM meta").fetchall()}
+
+    new_lo = int(start_ms) if start_ms is not None else 0
+    new_hi = int(end_ms)
+
+    con.execute("BEGIN")
+    try:
+        max_row = con.execute("SELECT MAX(id) FROM revlog").fetchone()
+        max_id = int(max_row[0]) if max_row and max_row[0] is not None else None
+        if start_ms is None and max_id is not None:
+            # All-time stats have no upper bound (reviews dated ahead of this clock included).
+            new_hi = max(new_hi, max_id)
+        try:
+            mod_row = con.execute("SELECT mod FROM col").fetchone()
+            col_mod = str(int(mod_row[0])) if mod_row and mod_row[0] is not None else None
+        except sqlite3.Error:
+            col_mod = None
+        # Anki bumps col.mod on every change it saves (reviews, deletions, syncs).
+        untouched = (
+            col_mod is not None
+            and state.get("col_mod") == col_mod
+            and state.get("revlog_max_id") == str(max_id)
+        )
+        revlog_count: int | None = None
+
+        def _rows_up_to(last_id: int) -> int:
+            nonlocal revlog_count
+            if untouched:
+                # Same revlog as when revlog_rows was counted at state["hi"]: add the id range since.
+                between = con.execute(
+                    "SELECT COUNT(*) FROM revlog WHERE id > ? AND id <= ?", (int(state["hi"]), int(last_id))
+                ).fetchone()
+                return int(state["revlog_rows"]) + int(between[0] or 0)
+            if revlog_count is None:
+                revlog_count = int(con.execute("SELECT COUNT(*) FROM revlog").fetchone()[0] or 0)
+            above = con.execute("SELECT COUNT(*) FROM revlog WHERE id > ?", (int(last_id),)).fetchone()
+            return revlog_count - int(above[0] or 0)
+
+        lo = hi = 0
+        reuse = (
+            state.get("version") == str(_REVIEW_STATS_VERSION)
+            and state.get("collection") == collection_key
+            and "lo" in state
+            and "hi" in state
+            and "revlog_rows" in state
+        )
+        if reuse:
+            lo = int(state["lo"])
+            hi = int(state["hi"])
+            reuse = hi <= new_hi and new_lo <= hi and (untouched or _rows_up_to(hi) == int(state["revlog_rows"]))
+        untouched = untouched and reuse
+
+        stats_con.execute("BEGIN")
+        try:
+            if not reuse:
+                stats_con.execute("DELETE FROM card_reviews")
+                lo, hi = new_lo, new_lo - 1
+            if new_lo < lo:
+                _apply_revlog_range(con, stats_con, first_id=new_lo, last_id=lo - 1, sign=1)
+            elif new_lo > lo:
+                _apply_revlog_range(con, stats_con, first_id=lo, last_id=new_lo - 1, sign=-1)
+                stats_con.execute("DELETE FROM card_reviews WHERE revlog_rows <= 0")
+            if new_hi > hi:
+                _apply_revlog_range(con, stats_con, first_id=hi + 1, last_id=new_hi, sign=1)
+            stats_con.executemany(
+                "INSERT INTO meta(key, value) VALUES(?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                [
+                    ("version", str(_REVIEW_STATS_VERSION)),
+                    ("collection", collection_key),
+                    ("lo", str(new_lo)),
+                    ("hi", str(new_hi)),
+                    ("revlog_rows", str(_rows_up_to(new_hi))),
+                    ("col_mod", col_mod or ""),
+                    ("revlog_max_id", str(max_id)),
+                ],
+            )
+            stats_con.commit()
+        except Exception:
+            try:
+                stats_con.rollback()
+            except Exception:
+                pass
+            raise
+    finally:
+        con.commit()
+
+
+def _review_stats_for_rules(
+    con: sqlite3.Connection,
+    *,
+    rules: list[_ResolvedRule],
+) -> tuple[list[tuple[int, int, int, int | None]], tuple[int, int, int, int | None]]:
+    """
+    Review stats for every rule from one pass over the union of their decks.
+
+    The pass groups cards JOIN card_reviews by deck, with conditional aggregates for each
+    distinct mature interval (true reviews, correct answers, first true review id) plus all
+    revlog rows (cards_studied). Rule stats are sums of their decks' partials. The totals take
+    each deck once, at the smallest mature interval among the rules covering it, so overlapping
+    rules don't double-count.
+
+    Returns (per-rule (reviews, correct, cards_studied, first_review_id), totals in the same shape).
+    """
+    empty = (0, 0, 0, None)
+    all_deck_ids = sorted({int(d) for r in rules for d in r.deck_ids})
+    if not all_deck_ids:
+        return [empty for _ in rules], empty
+
+    intervals = sorted({int(r.rule.mature_interval_days) for r in rules})
+    columns: list[str] = []
+    params: list[Any] = []
+    for ivl in intervals:
+        columns.extend(
+            [
+                "SUM(CASE WHEN c.ivl >= ? THEN a.true_total ELSE 0 END)",
+                "SUM(CASE WHEN c.ivl >= ? THEN a.true_correct ELSE 0 END)",
+                "MIN(CASE WHEN c.ivl >= ? AND a.true_total > 0 THEN a.first_true_review_id END)",
+            ]
+        )
+        params.extend([ivl, ivl, ivl])
+    did_placeholders = ",".join("?" for _ in all_deck_ids)
+    params.extend(all_deck_ids)
+    rows = con.execute(
         f"""
-        SELECT COUNT(*)
-        FROM revlog r
-        JOIN cards c ON c.id = r.cid
+        SELECT c.did, SUM(a.revlog_rows), {", ".join(columns)}
+        FROM cards c
+        JOIN review_stats.card_reviews a ON a.cid = c.id
         WHERE c.did IN ({did_placeholders})
-          {time_filter}
+        GROUP BY c.did
         """,
         params,
-    ).fetchone()
-    return int(row[0] or 0) if row else 0
+    ).fetchall()
+
+    # partials[did] = (revlog_rows, {mature_ivl: (reviews, correct, first_review_id)})
+    partials: dict[int, tuple[int, dict[int, tuple[int, int, int | None]]]] = {}
+    for row in rows:
+        by_ivl: dict[int, tuple[int, int, int | None]] = {}
+        for i, ivl in enumerate(intervals):
+            reviews, correct, first_id = row[2 + 3 * i : 5 + 3 * i]
+            by_ivl[ivl] = (int(reviews or 0), int(correct or 0), int(first_id) if first_id is not None else None)
+        partials[int(row[0])] = (int(row[1] or 0), by_ivl)
+
+    def _sum_decks(deck_ivls: dict[int, int]) -> tuple[int, int, int, int | None]:
+        reviews = correct = revlog_rows = 0
+        first_id: int | None = None
+        for did, ivl in deck_ivls.items():
+            part = partials.get(did)
+            if part is None:
+                continue
+            d_reviews, d_correct, d_first = part[1][ivl]
+            reviews += d_reviews
+            correct += d_correct
+            revlog_rows += part[0]
+            if d_first is not None:
+                first_id = d_first if first_id is None else min(first_id, d_first)
+        return reviews, correct, revlog_rows, first_id
+
+    totals_ivls: dict[int, int] = {}
+    for r in rules:
+        ivl = int(r.rule.mature_interval_days)
+        for did in r.deck_ids:
+            totals_ivls[int(did)] = min(ivl, totals_ivls.get(int(did), ivl))
+
+    per_rule = [_sum_decks({int(did): int(r.rule.mature_interval_days) for did in r.deck_ids}) for r in rules]
+    return per_rule, _sum_decks(totals_ivls)
 
 
 def export_snapshot(*, root: Path, trigger: str) -> Path:
@@ -545,10 +1258,12 @@ def export_snapshot(*, root: Path, trigger: str) -> Path:
     stats_path = out_dir / "anki_stats_snapshot.json"
     lexical_path = out_dir / "lexical_snapshot.json"
     known_words_db_path = out_dir / "known_words.sqlite"
+    review_stats_db_path = out_dir / "tokei_review_stats.sqlite"
     exported_at = _utc_now_iso()
     snapshot_date = exported_at.split("T", 1)[0]
 
     busy_timeout_ms = 5000
+    collection_stamp = _collection_stamp(collection_db)
 
     with _CollectionDbRo(collection_db, busy_timeout_ms=busy_timeout_ms) as con:
         end_ms = int(datetime.now(tz=timezone.utc).timestamp() * 1000)
@@ -558,70 +1273,84 @@ def export_snapshot(*, root: Path, trigger: str) -> Path:
         else:
             start_ms = max(0, end_ms - int(cfg.stats_range_days) * 86400 * 1000)
 
+        stats_con = sqlite3.connect(str(review_stats_db_path))
+        try:
+            _sync_review_stats(
+                con,
+                stats_con,
+                collection_key=str(collection_db),
+                start_ms=start_ms,
+                end_ms=end_ms,
+            )
+        finally:
+            stats_con.close()
+        con.execute("ATTACH DATABASE ? AS review_stats", (f"file:{review_stats_db_path}?mode=ro",))
+
         deck_rows: list[dict[str, Any]] = []
         lexical_deck_rows: list[dict[str, Any]] = []
-        all_lexemes: list[tuple[str, str, int, str]] = []
-        total_reviews = 0
-        total_correct = 0
-        total_cards_studied = 0
-        overall_start_ms: int | None = None
 
+        meta = _collection_meta(con, collection_db, collection_stamp, with_note_types_by_deck=False)
+        deck_names = dict(meta.decks)
+
+        deck_ids_by_rule: list[list[int]] = []
         for rule in cfg.rules:
-            deck_ids = _resolve_deck_ids(con, rule.deck_paths, bool(rule.include_subdecks))
+            deck_ids = _resolve_deck_ids(con, rule.deck_paths, bool(rule.include_subdecks), meta=meta)
             if not deck_ids:
                 raise RuntimeError(f"Rule '{rule.rule_id}' refers to missing deck(s): {rule.deck_paths}")
+            deck_ids_by_rule.append(deck_ids)
 
-            reviews, correct, used_start_ms = _count_true_reviews(
-                con,
-                deck_ids=deck_ids,
-                start_ms=start_ms,
-                end_ms=end_ms,
-                mature_interval_days=int(rule.mature_interval_days),
-            )
-            cards_studied = _count_cards_studied(con, deck_ids=deck_ids, start_ms=start_ms, end_ms=end_ms)
-
-            if used_start_ms is not None:
-                overall_start_ms = used_start_ms if overall_start_ms is None else min(overall_start_ms, used_start_ms)
-
-            total_reviews += int(reviews)
-            total_correct += int(correct)
-            total_cards_studied += int(cards_studied)
+        mids_by_deck = _note_type_ids_by_deck(
+            con,
+            sorted({d for rule, deck_ids in zip(cfg.rules, deck_ids_by_rule) if not rule.note_types for d in deck_ids}),
+        )
 
+        resolved_rules: list[_ResolvedRule] = []
+        for rule, deck_ids in zip(cfg.rules, deck_ids_by_rule):
             mids: list[int]
             if rule.note_types:
-                mids = _resolve_note_type_ids(con, rule.note_types)
+                mids = _resolve_note_type_ids(con, rule.note_types, meta=meta)
                 if not mids:
                     raise RuntimeError(f"Rule '{rule.rule_id}' note_types not found: {rule.note_types}")
             else:
-                mids = _distinct_note_type_ids_in_decks(con, deck_ids)
+                mids = sorted({mid for did in deck_ids for mid in mids_by_deck.get(did, ())})
 
-            ord_by_mid = _field_ord_by_mid(con, mids, rule.target_field)
+            ord_by_mid = _field_ord_by_mid(con, mids, rule.target_field, meta=meta)
             missing = [m for m in mids if m not in ord_by_mid]
             if missing:
                 raise RuntimeError(
                     f"Rule '{rule.rule_id}' target_field '{rule.target_field}' missing on {len(missing)} note type(s)."
                 )
+            resolved_rules.append(
+                _ResolvedRule(
+                    rule=rule,
+                    deck_ids=deck_ids,
+                    note_type_ids=mids if rule.note_types else None,
+                    field_ord_by_mid=ord_by_mid,
+                )
+            )
 
-            rows = con.execute(
-                "SELECT id, name FROM decks WHERE id IN (" + ",".join("?" for _ in deck_ids) + ") ORDER BY id",
-                (*[int(d) for d in deck_ids],),
-            ).fetchall()
-            deck_id0 = int(deck_ids[0])
-            deck_name0 = str(rule.deck_paths[0])
-            for did, name in rows:
-                if int(did) == deck_id0:
-                    deck_name0 = str(name or deck_name0)
-                    break
+        rule_stats, (total_reviews, total_correct, total_cards_studied, first_review_id) = _review_stats_for_rules(
+            con, rules=resolved_rules
+        )
+        overall_start_ms: int | None = int(start_ms) if start_ms is not None else first_review_id
 
-            lexeme_surfaces = _mature_lexeme_surfaces(
-                con,
-                deck_ids=deck_ids,
-                note_type_ids=mids if rule.note_types else None,
-                field_ord_by_mid=ord_by_mid,
-                mature_interval_days=int(rule.mature_interval_days),
-            )
-            for s in lexeme_surfaces:
-                all_lexemes.append((exported_at, rule.rule_id, int(deck_id0), str(s)))
+        lexical_counts = [0 for _ in resolved_rules]
+
+        def _counted_lexemes() -> Iterator[tuple[str, str]]:
+            for idx, surface in _mature_lexemes(con, rules=resolved_rules):
+                lexical_counts[idx] += 1
+                yield resolved_rules[idx].rule.rule_id, surface
+
+        with sqlite3.connect(str(known_words_db_path)) as kw_con:
+            added, removed = _write_known_lexemes(kw_con, _counted_lexemes(), snapshot_date=snapshot_date)
+        print(f"known_words.sqlite: {added} added, {removed} removed", file=sys.stderr)
+
+        for resolved, (reviews, correct, cards_studied, _first_id), lexical_count in zip(
+            resolved_rules, rule_stats, lexical_counts
+        ):
+            rule = resolved.rule
+            deck_id0 = int(resolved.deck_ids[0])
+            deck_name0 = deck_names.get(deck_id0) or str(rule.deck_paths[0])
 
             lexical_deck_rows.append(
                 {
@@ -630,7 +1359,7 @@ def export_snapshot(*, root: Path, trigger: str) -> Path:
                     "deck_name": deck_name0.replace("\x1f", "::"),
                     "target_field": rule.target_field,
                     "mature_interval_days": int(rule.mature_interval_days),
-                    "mature_lexical_count": int(len(lexeme_surfaces)),
+                    "mature_lexical_count": int(lexical_count),
                 }
             )
 
@@ -673,45 +1402,6 @@ def export_snapshot(*, root: Path, trigger: str) -> Path:
             },
         }
 
-    with sqlite3.connect(str(known_words_db_path)) as kw_con:
-        _ensure_known_words_schema(kw_con)
-        kw_con.execute("BEGIN")
-        try:
-            for _snapshot_ts, rule_id, _deck_id, surface in all_lexemes:
-                normalized = _normalize_surface_for_identity(surface)
-                if not normalized:
-                    continue
-                content_key = _content_key_for_lexeme(normalized, rule_id)
-                row = kw_con.execute(
-                    """
-                    INSERT INTO lexemes (
-                      content_key, surface, normalized_surface, rule_id, first_seen, last_seen
-                    )
-                    VALUES (?, ?, ?, ?, ?, ?)
-                    ON CONFLICT(content_key) DO UPDATE SET
-                      last_seen = excluded.last_seen
-                    RETURNING id
-                    """,
-                    (content_key, surface, normalized, rule_id, snapshot_date, snapshot_date),
-                ).fetchone()
-                if not row:
-                    continue
-                lexeme_id = int(row[0])
-                kw_con.execute(
-                    """
-                    INSERT OR IGNORE INTO lexeme_snapshots(lexeme_id, snapshot_date)
-                    VALUES(?, ?)
-                    """,
-                    (lexeme_id, snapshot_date),
-                )
-            kw_con.commit()
-        except Exception:
-            try:
-                kw_con.rollback()
-            except Exception:
-                pass
-            raise
-
     lexical_snapshot = {
         "range": {"start": exported_at, "end": exported_at},
         "decks": lexical_deck_rows,
@@ -737,33 +1427,20 @@ def discover_collection(*, profile: str) -> dict[str, Any]:
         return {"ok": False, "error": f"collection.anki2 not found: {collection_db}"}
 
     busy_timeout_ms = 5000
-    with _CollectionDbRo(collection_db, busy_timeout_ms=busy_timeout_ms) as con:
-        deck_rows = con.execute("SELECT id, name FROM decks ORDER BY name").fetchall()
-        decks: list[dict[str, Any]] = [{"id": int(did), "name": _to_deck_path(str(name or ""))} for did, name in deck_rows]
-
-        nt_rows = con.execute("SELECT id, name FROM notetypes ORDER BY name").fetchall()
-        note_types: list[dict[str, Any]] = [{"id": int(mid), "name": str(name or "")} for mid, name in nt_rows]
-
-        fields_rows = con.execute("SELECT ntid, ord, name FROM fields ORDER BY ntid, ord").fetchall()
-        fields_by_mid: dict[int, list[str]] = {}
-        for ntid, _ord, fname in fields_rows:
-            fields_by_mid.setdefault(int(ntid), []).append(str(fname or ""))
-        for nt in note_types:
-            nt["fields"] = fields_by_mid.get(int(nt["id"]), [])
-
-        deck_mid_rows = con.execute(
-            """
-            SELECT DISTINCT c.did, n.mid
-            FROM cards c
-            JOIN notes n ON n.id = c.nid
-            ORDER BY c.did, n.mid
-            """
-        ).fetchall()
-        mids_by_deck: dict[int, list[int]] = {}
-        for did, mid in deck_mid_rows:
-            mids_by_deck.setdefault(int(did), []).append(int(mid))
-        for d in decks:
-            d["note_type_ids"] = sorted(set(mids_by_deck.get(int(d["id"]), [])))
+    stamp = _collection_stamp(collection_db)
+    meta = _cached_collection_meta(collection_db, stamp, with_note_types_by_deck=True)
+    if meta is None:
+        with _CollectionDbRo(collection_db, busy_timeout_ms=busy_timeout_ms) as con:
+            meta = _collection_meta(con, collection_db, stamp, with_note_types_by_deck=True)
+
+    decks: list[dict[str, Any]] = [{"id": int(did), "name": _to_deck_path(name)} for did, name in meta.decks]
+    note_types: list[dict[str, Any]] = [
+        {"id": int(mid), "name": name, "fields": [fname for _ord, fname in meta.fields.get(int(mid), [])]}
+        for mid, name in meta.note_types
+    ]
+    mids_by_deck = meta.note_type_ids_by_deck or {}
+    for d in decks:
+        d["note_type_ids"] = sorted(set(mids_by_deck.get(int(d["id"]), [])))
 
     return {"ok": True, "profile": profile, "decks": decks, "note_types": note_types}
 
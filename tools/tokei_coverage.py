@@ -0,0 +1,227 @@
+"""
+Known-word coverage for a Japanese text (book, subtitle file, ...).
+
+Tokenizes the text with spaCy (ja_core_news_md) and checks each token against the known
+surfaces and lemmas in tokei_words.sqlite. Reports token coverage, distinct-lemma coverage
+and the most frequent unknown lemmas as JSON.
+
+Needs spaCy + ja_core_news_md (the same environment as tokei_phase2_lemmas.py, e.g.
+.venv-lemmas); `tokei coverage` picks that interpreter when it exists.
+"""
+
+from __future__ import annotations
+
+import bisect
+import json
+import re
+import sqlite3
+import sys
+from collections import Counter
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+from tokei_lemma_common import SPACY_DISABLED_PIPES, SPACY_JA_MODEL, normalize_surface
+from utils import get_user_root
+
+_PIPE_BATCH_SIZE = 64
+# SudachiPy rejects inputs over ~49k bytes; chunks are kept well under that.
+_CHUNK_MAX_CHARS = 4000
+_DEFAULT_TOP_UNKNOWN = 50
+
+_JAPANESE_CHAR_RE = re.compile(r"[\u3040-\u30ff\u3400-\u9fff]")
+_HTML_TAG_RE = re.compile(r"<[^>]+>")
+_RUBY_RT_RE = re.compile(r"<rt[^>]*>.*?</rt>|<rp[^>]*>.*?</rp>", flags=re.IGNORECASE | re.DOTALL)
+_SRT_TIMING_RE = re.compile(r"^\s*\d{1,2}:\d{2}:\d{2}[,.]\d{1,3}\s*-->")
+_ASS_OVERRIDE_RE = re.compile(r"\{[^}]*\}")
+
+
+class KnownIndex:
+    """Sorted, interned tuple of strings with bisect membership (no per-entry hash table)."""
+
+    __slots__ = ("_items",)
+
+    def __init__(self, items: Iterable[str]):
+        self._items = tuple(sorted({sys.intern(s) for s in items if s}))
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, value: object) -> bool:
+        if not isinstance(value, str):
+            return False
+        i = bisect.bisect_left(self._items, value)
+        return i < len(self._items) and self._items[i] == value
+
+
+def _default_words_db() -> Path:
+    return get_user_root() / "cache" / "tokei_words.sqlite"
+
+
+def load_known(words_db_path: Path) -> tuple[KnownIndex, KnownIndex]:
+    """Returns (known surfaces, known lemmas)."""
+    con = sqlite3.connect(f"file:{words_db_path}?mode=ro", uri=True)
+    try:
+        try:
+            # Counter tables: already distinct (and kept current by Phase 2).
+            surfaces = [r[0] for r in con.execute("SELECT normalized_surface FROM surface_refs")]
+            lemmas = [r[0] for r in con.execute("SELECT lemma FROM lemma_refs")]
+        except sqlite3.OperationalError:
+            surfaces = [r[0] for r in con.execute("SELECT DISTINCT normalized_surface FROM lexemes")]
+            lemmas = [r[0] for r in con.execute("SELECT DISTINCT lemma FROM lemmas")]
+    finally:
+        con.close()
+    return KnownIndex(str(s) for s in surfaces), KnownIndex(str(s) for s in lemmas)
+
+
+def _text_lines(raw: str, suffix: str) -> Iterator[str]:
+    suffix = suffix.lower()
+    if suffix in (".html", ".htm", ".xhtml"):
+        raw = _RUBY_RT_RE.sub("", raw)
+        raw = re.sub(r"<br\s*/?>|</p>|</div>", "\n", raw, flags=re.IGNORECASE)
+        raw = _HTML_TAG_RE.sub("", raw)
+    for line in raw.splitlines():
+        if suffix == ".srt":
+            if line.strip().isdigit() or _SRT_TIMING_RE.match(line):
+                continue
+            line = _HTML_TAG_RE.sub("", line)
+        elif suffix in (".ass", ".ssa"):
+            if not line.startswith("Dialogue:"):
+                continue
+            parts = line.split(",", 9)
+            line = parts[9] if len(parts) == 10 else ""
+            line = _ASS_OVERRIDE_RE.sub("", line).replace("\\N", " ").replace("\\n", " ")
+        line = line.strip()
+        if line:
+            yield line
+
+
+def _chunks(lines: Iterable[str]) -> Iterator[str]:
+    buf: list[str] = []
+    size = 0
+    for line in lines:
+        for start in range(0, len(line), _CHUNK_MAX_CHARS):
+            part = line[start : start + _CHUNK_MAX_CHARS]
+            if buf and size + len(part) > _CHUNK_MAX_CHARS:
+                yield "\n".join(buf)
+                buf = []
+                size = 0
+            buf.append(part)
+            size += len(part) + 1
+    if buf:
+        yield "\n".join(buf)
+
+
+def _load_nlp() -> Any | None:
+    try:
+        import spacy  # type: ignore
+
+        return spacy.load(SPACY_JA_MODEL, disable=list(SPACY_DISABLED_PIPES))
+    except Exception:
+        return None
+
+
+def coverage(
+    nlp: Any,
+    lines: Iterable[str],
+    *,
+    known_surfaces: KnownIndex,
+    known_lemmas: KnownIndex,
+    top: int = _DEFAULT_TOP_UNKNOWN,
+) -> dict[str, Any]:
+    tokens = 0
+    known_tokens = 0
+    lemma_counts: Counter[str] = Counter()
+    lemma_known: dict[str, bool] = {}
+    # Lemmas with at least one token known only by its surface (a CSV lists that inflection).
+    lemma_known_by_surface: set[str] = set()
+
+    for doc in nlp.pipe(_chunks(lines), batch_size=_PIPE_BATCH_SIZE):
+        for tok in doc:
+            if getattr(tok, "is_space", False) or getattr(tok, "is_punct", False):
+                continue
+            surface = normalize_surface(getattr(tok, "text", ""))
+            if not surface or not _JAPANESE_CHAR_RE.search(surface):
+                continue
+            lemma = normalize_surface(getattr(tok, "lemma_", "") or "") or surface
+            known = lemma_known.get(lemma)
+            if known is None:
+                # Known-word CSVs list dictionary forms as surfaces, so check lemmas there too.
+                known = lemma in known_lemmas or lemma in known_surfaces
+                lemma_known[lemma] = known
+            if not known and surface in known_surfaces:
+                known = True
+                lemma_known_by_surface.add(lemma)
+            tokens += 1
+            lemma_counts[lemma] += 1
+            if known:
+                known_tokens += 1
+
+    # A lemma counts as known when any of its tokens did, so both coverages agree on the text.
+    known_lemma_count = sum(1 for lemma in lemma_counts if lemma_known[lemma] or lemma in lemma_known_by_surface)
+    unknown = [
+        (lemma, n)
+        for lemma, n in lemma_counts.most_common()
+        if not (lemma_known[lemma] or lemma in lemma_known_by_surface)
+    ]
+    return {
+        "tokens": tokens,
+        "known_tokens": known_tokens,
+        "token_coverage": round(100.0 * known_tokens / tokens, 2) if tokens else 0.0,
+        "lemmas": len(lemma_counts),
+        "known_lemmas": known_lemma_count,
+        "lemma_coverage": round(100.0 * known_lemma_count / len(lemma_counts), 2) if lemma_counts else 0.0,
+        "top_unknown": [{"lemma": lemma, "count": n} for lemma, n in unknown[: max(0, top)]],
+    }
+
+
+def main(argv: list[str]) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Known-word coverage of a Japanese text.")
+    parser.add_argument("path", help="Text, HTML, .srt or .ass file; '-' reads stdin.")
+    parser.add_argument("--words-db", help="tokei_words.sqlite (default: <user root>/cache/tokei_words.sqlite).")
+    parser.add_argument("--top", type=int, default=_DEFAULT_TOP_UNKNOWN, help="Number of unknown lemmas to list.")
+    args = parser.parse_args(argv[1:])
+
+    words_db = Path(args.words_db) if args.words_db else _default_words_db()
+    if not words_db.exists():
+        print(f"Known-word database not found: {words_db} (run a Tokei sync first).", file=sys.stderr)
+        return 2
+
+    if args.path == "-":
+        raw = sys.stdin.buffer.read().decode("utf-8-sig", errors="replace")
+        suffix = ""
+    else:
+        src = Path(args.path)
+        try:
+            raw = src.read_text(encoding="utf-8-sig", errors="replace")
+        except OSError as e:
+            print(f"Could not read {src}: {e}", file=sys.stderr)
+            return 2
+        suffix = src.suffix
+
+    nlp = _load_nlp()
+    if nlp is None:
+        print(
+            f"spaCy/{SPACY_JA_MODEL} is not available in this Python; run with the lemma venv "
+            "(see requirements-lemmas.txt).",
+            file=sys.stderr,
+        )
+        return 3
+
+    known_surfaces, known_lemmas = load_known(words_db)
+    result = coverage(
+        nlp,
+        _text_lines(raw, suffix),
+        known_surfaces=known_surfaces,
+        known_lemmas=known_lemmas,
+        top=args.top,
+    )
+    result = {"source": args.path, **result}
+    sys.stdout.buffer.write(json.dumps(result, ensure_ascii=False, indent=2).encode("utf-8"))
+    sys.stdout.buffer.write(b"\n")
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main(sys.argv))
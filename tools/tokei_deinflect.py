@@ -0,0 +1,445 @@
+"""
+Rule-based Japanese deinflection (pure Python, no model download).
+
+Used as the `phase2.lemmatizer = "deinflect"` backend when spaCy / ja_core_news_md is not
+available (e.g. Python 3.14+). It maps conjugated verbs and i-adjectives back to their
+dictionary form using compact godan / ichidan / i-adjective tables; anything it does not
+recognize is returned unchanged.
+
+An optional dictionary-form word list (one word per line) resolves the ambiguous cases
+(potential/passive/causative forms, ichidan vs godan stems). It is kept as a sorted list
+and searched with bisect. Forms that are certainly inflected but fit several dictionary
+forms (買った: 買う/買る/買つ, 起きます: 起きる/起く, 分かった: 分かる or an adjective 分い) need the word list; without it
+lemmatize() returns None for them instead of guessing.
+
+`--check` runs the hand-labelled sample corpus (tokei_deinflect_corpus.tsv) and reports
+agreement with and without a word list.
+"""
+
+from __future__ import annotations
+
+import bisect
+import hashlib
+import json
+import re
+import sqlite3
+import sys
+import unicodedata
+from dataclasses import dataclass
+from pathlib import Path
+
+
+DEINFLECT_MODEL = "tokei_deinflect"
+DEINFLECT_VERSION = "3"
+
+_SAMPLE_CORPUS = Path(__file__).resolve().with_name("tokei_deinflect_corpus.tsv")
+
+# Word types (bit flags). 0 means "unknown" (the raw surface).
+_V1 = 1  # ichidan
+_V5 = 2  # godan
+_VS = 4  # suru
+_VK = 8  # kuru
+_ADJ = 16  # i-adjective
+_TE = 32  # te-form (intermediate only)
+_TERMINAL = _V1 | _V5 | _VS | _VK | _ADJ
+
+_MAX_STEPS = 6
+
+# Godan dictionary ending -> (a-row, i-row, e-row, o-row, te-form, ta-form).
+_GODAN: dict[str, tuple[str, str, str, str, str, str]] = {
+    "る": ("ら", "り", "れ", "ろ", "って", "った"),
+    "う": ("わ", "い", "え", "お", "って", "った"),
+    "く": ("か", "き", "け", "こ", "いて", "いた"),
+    "ぐ": ("が", "ぎ", "げ", "ご", "いで", "いだ"),
+    "す": ("さ", "し", "せ", "そ", "して", "した"),
+    "つ": ("た", "ち", "て", "と", "って", "った"),
+    "む": ("ま", "み", "め", "も", "んで", "んだ"),
+    "ぶ": ("ば", "び", "べ", "ぼ", "んで", "んだ"),
+    "ぬ": ("な", "に", "ね", "の", "んで", "んだ"),
+}
+
+_MASU_SUFFIXES = ("ます", "ました", "ません", "ませんでした", "ましょう", "まして")
+
+# te-form auxiliaries: (aux after て/で, type of the auxiliary as a whole).
+_TE_AUXILIARIES: tuple[tuple[str, int], ...] = (
+    ("いる", _V1),
+    ("る", _V1),
+    ("おく", _V5),
+    ("ある", _V5),
+    ("しまう", _V5),
+    ("くれる", _V1),
+    ("もらう", _V5),
+    ("あげる", _V1),
+    ("いく", _V5),
+    ("くる", _VK),
+    ("みる", _V1),
+    ("ください", 0),
+)
+
+# Kana rows used to sanity-check ichidan stems when no word list is available.
+_E_I_ROW = set("えけげせぜてでねへべぺめれいきぎしじちぢにひびぴみりエケゲセゼテデネヘベペメレイキギシジチヂニヒビピミリ")
+_I_ROW = set("いきぎしじちぢにひびぴみりイキギシジチヂニヒビピミリ")
+# Before かった these end an adjective stem, never a -かる verb (美しかった, 食べなかった).
+_ADJ_ONLY_KATTA_STEM_END = set("しな")
+# Adjectives that also read as a godan negative (つまらない: not 詰まる's negative); kept whole,
+# as Sudachi does, and never deinflected further.
+_NAI_ADJECTIVES = frozenset(
+    {"つまらない", "詰まらない", "くだらない", "下らない", "たまらない", "堪らない"}
+)
+_KANA_RE = re.compile(r"[぀-ヿ]")
+_KANJI_RE = re.compile(r"[㐀-鿿]")
+
+
+@dataclass(frozen=True)
+class _Rule:
+    kana_in: str
+    kana_out: str
+    rules_in: int  # types the inflected form may have (0: only the raw surface)
+    rules_out: int  # type of the produced form
+    ambiguous: bool = False  # also matches common dictionary forms; needs confirmation
+    shared: bool = False  # several dictionary forms inflect to this; only the word list can pick
+
+
+@dataclass(frozen=True)
+class _Candidate:
+    term: str
+    rules: int
+    steps: int
+    matched: int  # total inflection kana consumed; longer (more specific) matches win ties
+    needs_dict: bool
+    shared: bool  # the last step is shared (earlier ones are pinned down by the rule applied after them)
+
+
+def _build_rules() -> list[_Rule]:
+    out: list[_Rule] = []
+
+    def add(
+        kana_in: str, kana_out: str, rules_in: int, rules_out: int, ambiguous: bool = False, shared: bool = False
+    ) -> None:
+        out.append(_Rule(kana_in, kana_out, rules_in, rules_out, ambiguous, shared))
+
+    for base, (a, i, e, o, te, ta) in _GODAN.items():
+        # って/った (う, つ, る) and んで/んだ (ぬ, ぶ, む) are shared by three rows each, and the
+        # ます-stem also fits an ichidan reading (起きます: 起きる or 起く).
+        shared_te = te in ("って", "んで")
+        add(a + "ない", base, _ADJ, _V5)
+        for m in _MASU_SUFFIXES:
+            add(i + m, base, 0, _V5, shared=True)
+        add(i + "たい", base, _ADJ, _V5, shared=True)
+        add(te, base, _TE, _V5, shared=shared_te)
+        add(ta, base, 0, _V5, shared=shared_te)
+        add(ta + "ら", base, 0, _V5, shared=shared_te)
+        add(ta + "り", base, 0, _V5, shared=shared_te)
+        add(e + "ば", base, 0, _V5)
+        add(o + "う", base, 0, _V5)
+        add(e, base, 0, _V5, ambiguous=True)  # imperative
+        add(e + "る", base, _V1, _V5, ambiguous=True)  # potential
+        add(a + "れる", base, _V1, _V5, ambiguous=True)  # passive
+        add(a + "せる", base, _V1, _V5, ambiguous=True)  # causative
+
+    # 行く is irregular in the te/ta forms.
+    for form in ("行って", "行った", "行ったら"):
+        add(form, "行く", _TE if form == "行って" else 0, _V5)
+
+    # Ichidan. The ます-stem rules are only shared after an i-row kana (see _candidates).
+    add("ない", "る", _ADJ, _V1, ambiguous=True, shared=True)
+    for m in _MASU_SUFFIXES:
+        add(m, "る", 0, _V1, shared=True)
+    add("たい", "る", _ADJ, _V1, shared=True)
+    add("て", "る", _TE, _V1)
+    add("た", "る", 0, _V1)
+    add("たら", "る", 0, _V1)
+    add("たり", "る", 0, _V1)
+    add("れば", "る", 0, _V1)
+    add("よう", "る", 0, _V1)
+    add("ろ", "る", 0, _V1, ambiguous=True)
+    add("られる", "る", _V1, _V1)
+    add("させる", "る", _V1, _V1)
+
+    # Suru.
+    for m in _MASU_SUFFIXES:
+        add("し" + m, "する", 0, _VS)
+    for form, rules_in in (
+        ("しない", _ADJ), ("したい", _ADJ), ("して", _TE), ("した", 0), ("したら", 0),
+        ("すれば", 0), ("しよう", 0), ("しろ", 0), ("される", _V1), ("させる", _V1),
+    ):
+        add(form, "する", rules_in, _VS)
+
+    # Kuru, in kana (こない, きます) and with 来 (来ない, 来ます).
+    for ko, ki, ku in (("こ", "き", "く"), ("来", "来", "来")):
+        for m in _MASU_SUFFIXES:
+            add(ki + m, ku + "る", 0, _VK)
+        for form, rules_in in (
+            (ko + "ない", _ADJ), (ki + "たい", _ADJ), (ki + "て", _TE), (ki + "た", 0), (ki + "たら", 0),
+            (ku + "れば", 0), (ko + "よう", 0), (ko + "られる", _V1), (ko + "させる", _V1),
+        ):
+            add(form, ku + "る", rules_in, _VK)
+
+    # te-form auxiliaries (ている, てしまう, ...) reduce to the te-form, which the rules above resolve.
+    for aux, aux_type in _TE_AUXILIARIES:
+        ambiguous = aux == "る"  # てる / でる also end 捨てる, 出る, ...
+        add("て" + aux, "て", aux_type, _TE, ambiguous)
+        add("で" + aux, "で", aux_type, _TE, ambiguous)
+    add("ちゃう", "て", _V5, _TE)
+    add("じゃう", "で", _V5, _TE)
+
+    # i-adjectives. かった also ends the ta-form of -かる verbs (分かった, 見つかった); see
+    # _ADJ_ONLY_KATTA_STEM_END for the stems where it cannot.
+    add("かった", "い", _ADJ, _ADJ, ambiguous=True, shared=True)
+    add("かったら", "い", 0, _ADJ, ambiguous=True, shared=True)
+    add("くない", "い", _ADJ, _ADJ)
+    add("くて", "い", 0, _ADJ)
+    add("ければ", "い", 0, _ADJ)
+    add("く", "い", 0, _ADJ, ambiguous=True)
+    add("さ", "い", 0, _ADJ, ambiguous=True)
+    add("そう", "い", 0, _ADJ, ambiguous=True)
+
+    return out
+
+
+def _is_suru_compound(c: _Candidate) -> bool:
+    stem = c.term[:-2]
+    return c.rules == _VS and len(stem) >= 2 and all(_KANJI_RE.match(ch) for ch in stem)
+
+
+def _candidate_key(c: _Candidate) -> tuple[int, int, int]:
+    # Most fully deinflected wins; then 勉強して is 勉強する (suru) rather than 勉強す (godan);
+    # then the most specific suffix match (食べました: ました -> る beats した -> す).
+    return (c.steps, 1 if _is_suru_compound(c) else 0, c.matched)
+
+
+def _best_candidate(cands: list[_Candidate]) -> _Candidate | None:
+    # Remaining ties go to rule order (only reached between word-list matches).
+    best: _Candidate | None = None
+    best_key = (-1, -1, -1)
+    for c in cands:
+        key = _candidate_key(c)
+        if key > best_key:
+            best, best_key = c, key
+    return best
+
+
+class Deinflector:
+    def __init__(self, words: list[str] | None = None, *, words_fingerprint: str | None = None):
+        # Rules bucketed by their last two kana (or one, for single-kana suffixes), so each
+        # candidate only scans the handful of rules that can possibly match.
+        self._rules_by_tail: dict[str, list[_Rule]] = {}
+        for rule in _build_rules():
+            self._rules_by_tail.setdefault(rule.kana_in[-2:], []).append(rule)
+        self._words: list[str] = sorted(set(words or []))
+        self.version = DEINFLECT_VERSION + (f"+{words_fingerprint}" if words_fingerprint else "")
+
+    def _has_word(self, term: str) -> bool:
+        i = bisect.bisect_left(self._words, term)
+        return i < len(self._words) and self._words[i] == term
+
+    def _candidates(self, surface: str) -> list[_Candidate]:
+        out = [_Candidate(surface, 0, 0, 0, False, False)]
+        seen = {(surface, 0)}
+        i = 0
+        while i < len(out):
+            cur = out[i]
+            i += 1
+            if cur.steps >= _MAX_STEPS or not cur.term or cur.term in _NAI_ADJECTIVES:
+                continue
+            rules = self._rules_by_tail.get(cur.term[-1:], [])
+            if len(cur.term) >= 2:
+                rules = rules + self._rules_by_tail.get(cur.term[-2:], [])
+            for rule in rules:
+                if cur.rules != 0 and not (cur.rules & rule.rules_in):
+                    continue
+                if not cur.term.endswith(rule.kana_in):
+                    continue
+                stem = cur.term[: len(cur.term) - len(rule.kana_in)]
+                if not stem and not (rule.rules_out & (_VS | _VK) or _KANJI_RE.search(rule.kana_in)):
+                    continue
+                if stem and rule.rules_out == _VK and rule.kana_out == "くる":
+                    continue  # kana くる forms only stand alone (起きた is not 起くる)
+                if rule.rules_out == _V1 and rule.kana_out == "る" and not (
+                    stem and (stem[-1] in _E_I_ROW or _KANJI_RE.match(stem[-1]))
+                ):
+                    continue
+                needs_dict = cur.needs_dict
+                shared = False
+                settled_by_stem = (rule.rules_out == _V1 and stem and stem[-1] in _E_I_ROW) or (
+                    rule.rules_out == _ADJ and rule.kana_in.startswith("かった") and stem[-1:] in _ADJ_ONLY_KATTA_STEM_END
+                )
+                if rule.ambiguous and not settled_by_stem:
+                    needs_dict = True
+                    shared = rule.shared  # 見ない: 見る, or an adjective like 少ない
+                elif rule.shared and not rule.ambiguous and not (rule.rules_out == _V1 and stem[-1:] not in _I_ROW):
+                    # Ichidan ます-stems are only in doubt after an i-row kana (食べます is not 食ぶ).
+                    shared = True
+                term = stem + rule.kana_out
+                key = (term, rule.rules_out)
+                if key in seen:
+                    continue
+                seen.add(key)
+                out.append(
+                    _Candidate(
+                        term, rule.rules_out, cur.steps + 1, cur.matched + len(rule.kana_in), needs_dict, shared
+                    )
+                )
+        return out
+
+    def lemmatize(self, surface: str) -> str | None:
+        """
+        Dictionary form of `surface`, or `surface` itself when no rule applies.
+        None when it is inflected but several dictionary forms fit and the word list (if any)
+        confirms none of them; callers leave such surfaces unlinked.
+        """
+        s = unicodedata.normalize("NFC", str(surface or "").strip())
+        if not s or not _KANA_RE.search(s[-1]):
+            return s
+        if _is_suru_compound(_Candidate(s, _VS, 0, 0, False, False)) and s.endswith("する"):
+            return s[:-2]
+
+        cands = [c for c in self._candidates(s)[1:] if c.rules & _TERMINAL]
+        chosen: _Candidate | None = None
+        if self._words:
+            if self._has_word(s):
+                return s
+            chosen = _best_candidate([c for c in cands if self._has_word(c.term)])
+        if chosen is None:
+            chosen = _best_candidate([c for c in cands if not (c.needs_dict or c.shared)])
+            # A shared reading that goes further than any safe one (待っていた: 待つ/待る/待う vs
+            # 待ってく) means the surface is inflected but unresolved: leave it unlinked.
+            best_shared = _best_candidate([c for c in cands if c.shared])
+            if best_shared is not None and (
+                chosen is None or _candidate_key(best_shared) > _candidate_key(chosen)
+            ):
+                return None
+        if chosen is None:
+            return s
+
+        # Sudachi (and so spaCy's ja models) split 勉強する into 勉強 + する; match that.
+        if _is_suru_compound(chosen):
+            return chosen.term[:-2]
+        return chosen.term
+
+    def lemmatize_many(self, surfaces: list[str]) -> list[str | None]:
+        memo: dict[str, str | None] = {}
+        out: list[str | None] = []
+        for s in surfaces:
+            if s not in memo:
+                memo[s] = self.lemmatize(s)
+            out.append(memo[s])
+        return out
+
+
+def load_deinflector(wordlist_path: Path | None = None) -> Deinflector:
+    """
+    Build a Deinflector, optionally backed by a dictionary-form word list (UTF-8, one word per line).
+    The word list's hash is part of the version so lemma_cache entries are invalidated when it changes.
+    """
+    if wordlist_path is None or not wordlist_path.is_file():
+        return Deinflector()
+    raw = wordlist_path.read_bytes()
+    text = raw.decode("utf-8-sig", errors="replace")
+    words = [unicodedata.normalize("NFC", line.strip()) for line in text.splitlines()]
+    words = [w for w in words if w and not w.startswith("#")]
+    return Deinflector(words, words_fingerprint=hashlib.sha256(raw).hexdigest()[:12])
+
+
+def compare_with_cache(words_db_path: Path, deinflector: Deinflector, *, model: str = "ja_core_news_md") -> dict:
+    """
+    Measure agreement with spaCy using the lemmas it already produced (tokei_words.sqlite lemma_cache).
+    """
+    con = sqlite3.connect(f"file:{words_db_path}?mode=ro", uri=True)
+    try:
+        rows = con.execute(
+            "SELECT normalized_surface, lemma FROM lemma_cache WHERE model = ? ORDER BY normalized_surface",
+            (model,),
+        ).fetchall()
+    finally:
+        con.close()
+
+    pairs = {str(surface): str(expected) for surface, expected in rows}
+    return {"model": model, **_agreement(deinflector, list(pairs.items()), label="spacy")}
+
+
+def _agreement(deinflector: Deinflector, pairs: list[tuple[str, str]], *, label: str) -> dict:
+    agree = 0
+    unresolved = 0
+    samples: list[dict[str, str | None]] = []
+    for surface, expected in pairs:
+        got = deinflector.lemmatize(surface)
+        if got == expected:
+            agree += 1
+            continue
+        if got is None:
+            unresolved += 1
+        if len(samples) < 25:
+            samples.append({"surface": surface, label: expected, "deinflect": got})
+    compared = len(pairs)
+    return {
+        "compared": compared,
+        "agree": agree,
+        # Left unlinked (needs the word list) rather than given a wrong lemma.
+        "unresolved": unresolved,
+        "wrong": compared - agree - unresolved,
+        "agreement_rate": (agree / compared) if compared else 0.0,
+        "disagreements": samples,
+    }
+
+
+def check_sample_corpus(corpus_path: Path = _SAMPLE_CORPUS, *, wordlist_path: Path | None = None) -> dict:
+    """
+    Agreement on the hand-labelled sample corpus (surface<TAB>lemma per line), without a word
+    list and with one: `wordlist_path` if given, else the corpus's own lemmas (an upper bound).
+    """
+    pairs: list[tuple[str, str]] = []
+    for line in corpus_path.read_text(encoding="utf-8-sig").splitlines():
+        if not line.strip() or line.startswith("#"):
+            continue
+        surface, _, expected = line.partition("\t")
+        pairs.append((surface.strip(), expected.strip()))
+
+    if wordlist_path is not None:
+        with_words = load_deinflector(wordlist_path)
+        words_source = str(wordlist_path)
+    else:
+        with_words = Deinflector(sorted({expected for _surface, expected in pairs}))
+        words_source = "corpus lemmas"
+    return {
+        "corpus": str(corpus_path),
+        "no_wordlist": _agreement(Deinflector(), pairs, label="expected"),
+        "wordlist": {"source": words_source, **_agreement(with_words, pairs, label="expected")},
+    }
+
+
+def main(argv: list[str]) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Rule-based Japanese deinflection.")
+    parser.add_argument("words", nargs="*", help="Surfaces to lemmatize.")
+    parser.add_argument("--wordlist", help="Optional dictionary-form word list (one word per line).")
+    parser.add_argument(
+        "--compare",
+        metavar="WORDS_DB",
+        help="Report agreement with the spaCy lemmas cached in tokei_words.sqlite.",
+    )
+    parser.add_argument(
+        "--check",
+        nargs="?",
+        const=str(_SAMPLE_CORPUS),
+        metavar="CORPUS_TSV",
+        help="Report agreement on a hand-labelled corpus (default: the bundled tokei_deinflect_corpus.tsv).",
+    )
+    args = parser.parse_args(argv[1:])
+
+    wordlist_path = Path(args.wordlist) if args.wordlist else None
+    if args.check:
+        payload: object = check_sample_corpus(Path(args.check), wordlist_path=wordlist_path)
+    elif args.compare:
+        payload = compare_with_cache(Path(args.compare), load_deinflector(wordlist_path))
+    else:
+        deinflector = load_deinflector(wordlist_path)
+        payload = {w: deinflector.lemmatize(w) for w in args.words}
+    sys.stdout.buffer.write(json.dumps(payload, ensure_ascii=False, indent=2).encode("utf-8"))
+    sys.stdout.buffer.write(b"\n")
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover
+    raise SystemExit(main(sys.argv))
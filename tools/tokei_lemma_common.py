@@ -0,0 +1,114 @@
+"""
+Lemma helpers shared by tokei_sync.py and tokei_phase2_lemmas.py.
+
+Both write the same `lemma_cache` / `lemmas` / `lexeme_lemmas` rows, so surface normalization,
+the spaCy pipe and the link writer live here once. Stdlib-only (spaCy is passed in), so it
+imports in the app's Python and in the lemma venv alike.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import sqlite3
+import sys
+import unicodedata
+from typing import Any
+
+SPACY_JA_MODEL = "ja_core_news_md"
+# Lemmas only need the tokenizer/tagger output; skip the expensive dependency parse and NER.
+SPACY_DISABLED_PIPES = ("parser", "ner")
+
+_PIPE_BATCH_SIZE = 512
+# Below this many surfaces, worker start-up (each one reloads the model) costs more than it saves.
+_MULTIPROCESS_MIN_SURFACES = 20_000
+
+
+def normalize_surface(surface: str) -> str:
+    s = str(surface or "").strip()
+    s = unicodedata.normalize("NFC", s)
+    return re.sub(r"\s+", " ", s)
+
+
+def _pipe_processes(n_surfaces: int) -> int:
+    raw = os.environ.get("TOKEI_PHASE2_LEMMA_PROCESSES")
+    if raw and raw.strip():
+        try:
+            return max(1, int(raw.strip()))
+        except ValueError:
+            pass
+    # Frozen builds run scripts via runpy, which multiprocessing's spawn start method can't re-enter.
+    if getattr(sys, "frozen", False) or n_surfaces < _MULTIPROCESS_MIN_SURFACES:
+        return 1
+    return max(1, min(4, (os.cpu_count() or 1) - 1))
+
+
+def spacy_lemmas_for_surfaces(nlp: Any, surfaces: list[str]) -> list[str]:
+    if not surfaces:
+        return []
+    n_process = _pipe_processes(len(surfaces))
+    try:
+        docs = list(nlp.pipe(surfaces, batch_size=_PIPE_BATCH_SIZE, n_process=n_process))
+    except Exception:
+        if n_process == 1:
+            raise
+        docs = list(nlp.pipe(surfaces, batch_size=_PIPE_BATCH_SIZE, n_process=1))
+    return [spacy_lemma_from_doc(doc, surface) for doc, surface in zip(docs, surfaces)]
+
+
+def spacy_lemma_from_doc(doc: Any, surface: str) -> str:
+    for tok in doc:
+        if (
+            getattr(tok, "is_space", False)
+            or getattr(tok, "is_punct", False)
+            or getattr(tok, "is_stop", False)
+        ):
+            continue
+        lemma = normalize_surface(getattr(tok, "lemma_", "") or "")
+        if lemma:
+            return lemma
+        break
+    # Deterministic fallback for empty/degenerate cases.
+    return normalize_surface(surface)
+
+
+def link_lexeme_lemmas(con: sqlite3.Connection, links: list[tuple[int, str, str]]) -> int:
+    """
+    Bulk-write (lexeme_id, lemma, rule_id) links: stage them in a temp table, then resolve
+    lemma ids with two set-based INSERT ... SELECT statements (no per-lexeme round trips).
+    Runs inside the caller's transaction.
+    """
+    if not links:
+        return 0
+    con.execute(
+        """
+        CREATE TEMP TABLE IF NOT EXISTS lemma_link_stage (
+          lexeme_id INTEGER NOT NULL,
+          lemma TEXT NOT NULL,
+          rule_id TEXT NOT NULL
+        )
+        """
+    )
+    try:
+        con.execute("DELETE FROM temp.lemma_link_stage;")
+        con.executemany(
+            "INSERT INTO temp.lemma_link_stage(lexeme_id, lemma, rule_id) VALUES(?, ?, ?)",
+            links,
+        )
+        con.execute(
+            """
+            INSERT OR IGNORE INTO lemmas(lemma, reading, rule_id)
+            SELECT DISTINCT lemma, NULL, rule_id FROM temp.lemma_link_stage
+            """
+        )
+        con.execute(
+            """
+            INSERT OR IGNORE INTO lexeme_lemmas(lexeme_id, lemma_id)
+            SELECT s.lexeme_id, m.id
+            FROM temp.lemma_link_stage s
+            JOIN lemmas m ON m.lemma = s.lemma AND m.rule_id = s.rule_id
+            """
+        )
+    finally:
+        con.execute("DELETE FROM temp.lemma_link_stage;")
+    return len(links)
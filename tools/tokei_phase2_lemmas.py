@@ -1,30 +1,30 @@
 from __future__ import annotations
 
+import json
+import os
+import socketserver
 import sqlite3
 import sys
-import unicodedata
+import threading
 from pathlib import Path
 
+from tokei_lemma_common import (
+    SPACY_DISABLED_PIPES,
+    SPACY_JA_MODEL,
+    link_lexeme_lemmas,
+    spacy_lemmas_for_surfaces,
+)
 
-def _normalize(text: str) -> str:
-    s = str(text or "").strip()
-    return unicodedata.normalize("NFC", s)
+_WORKER_DEFAULT_PORT = 8767
 
 
-def _spacy_lemma_for_surface(nlp, surface: str) -> str:
-    doc = nlp(surface)
-    for tok in doc:
-        if (
-            getattr(tok, "is_space", False)
-            or getattr(tok, "is_punct", False)
-            or getattr(tok, "is_stop", False)
-        ):
-            continue
-        lemma = _normalize(getattr(tok, "lemma_", "") or "")
-        if lemma:
-            return lemma
-        break
-    return _normalize(surface)
+def _model_version() -> str | None:
+    try:
+        from importlib import metadata
+
+        return str(metadata.version(SPACY_JA_MODEL))
+    except Exception:
+        return None
 
 
 def _ensure_tables(con: sqlite3.Connection) -> None:
@@ -48,11 +48,118 @@ def _ensure_tables(con: sqlite3.Connection) -> None:
         )
         """
     )
+    con.execute(
+        """
+        CREATE TABLE IF NOT EXISTS lemma_cache (
+          normalized_surface TEXT NOT NULL,
+          model TEXT NOT NULL,
+          model_version TEXT NOT NULL,
+          lemma TEXT NOT NULL,
+          PRIMARY KEY (normalized_surface, model, model_version)
+        ) WITHOUT ROWID
+        """
+    )
+
+
+class _LemmaWorkerServer(socketserver.ThreadingTCPServer):
+    """
+    Resident lemma worker: keeps the spaCy model loaded and answers JSON-lines requests.
+
+    Requests (one JSON object per line):
+      {"op": "ping"}
+      {"op": "lemmatize", "surfaces": ["...", ...]}
+    Replies always carry "ok", "model" and "model_version"; lemmatize adds "lemmas"
+    (same length and order as "surfaces").
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, port: int, nlp, model_version: str):
+        super().__init__(("127.0.0.1", int(port)), _LemmaWorkerHandler)
+        self.nlp = nlp
+        self.model_version = model_version
+        # spaCy pipelines are not documented as thread-safe; serialize calls.
+        self.nlp_lock = threading.Lock()
+
+    def dispatch(self, req: object) -> dict:
+        base = {"ok": True, "model": SPACY_JA_MODEL, "model_version": self.model_version}
+        if not isinstance(req, dict):
+            return {"ok": False, "error": "request must be a JSON object"}
+        op = req.get("op")
+        if op == "ping":
+            return base
+        if op == "lemmatize":
+            surfaces = req.get("surfaces")
+            if not isinstance(surfaces, list):
+                return {"ok": False, "error": "surfaces must be a list"}
+            surfaces = [str(x or "") for x in surfaces]
+            with self.nlp_lock:
+                lemmas = spacy_lemmas_for_surfaces(self.nlp, surfaces)
+            return {**base, "lemmas": lemmas}
+        return {"ok": False, "error": f"unknown op: {op}"}
+
+
+class _LemmaWorkerHandler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        for raw in self.rfile:
+            if not raw.strip():
+                continue
+            try:
+                resp = self.server.dispatch(json.loads(raw.decode("utf-8")))  # type: ignore[attr-defined]
+            except Exception as e:
+                resp = {"ok": False, "error": type(e).__name__}
+            self.wfile.write((json.dumps(resp, ensure_ascii=False) + "\n").encode("utf-8"))
+            self.wfile.flush()
+
+
+def _serve(argv: list[str]) -> int:
+    port_raw = os.environ.get("TOKEI_LEMMA_WORKER_PORT") or ""
+    if "--port" in argv:
+        idx = argv.index("--port")
+        port_raw = argv[idx + 1] if idx + 1 < len(argv) else ""
+    try:
+        port = int(port_raw.strip()) if port_raw.strip() else _WORKER_DEFAULT_PORT
+    except ValueError:
+        print(f"Invalid port: {port_raw}", file=sys.stderr)
+        return 2
+
+    model_version = _model_version()
+    if model_version is None:
+        print(f"Model package {SPACY_JA_MODEL} is not installed.", file=sys.stderr)
+        return 3
+    try:
+        import spacy  # type: ignore
+    except Exception as e:
+        print(f"spaCy import failed: {type(e).__name__}", file=sys.stderr)
+        return 3
+    try:
+        nlp = spacy.load(SPACY_JA_MODEL, disable=list(SPACY_DISABLED_PIPES))
+    except Exception as e:
+        print(f"Failed to load model {SPACY_JA_MODEL}: {type(e).__name__}", file=sys.stderr)
+        return 3
+
+    try:
+        server = _LemmaWorkerServer(port, nlp, model_version)
+    except OSError as e:
+        print(f"Lemma worker could not listen on 127.0.0.1:{port}: {e}", file=sys.stderr)
+        return 2
+    print(f"Lemma worker ready on 127.0.0.1:{port} ({SPACY_JA_MODEL} {model_version})", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
 
 
 def main(argv: list[str]) -> int:
+    if "--serve" in argv[1:]:
+        return _serve(argv[1:])
+
     if len(argv) < 2:
-        print("Usage: tokei_phase2_lemmas.py <words_db_path> [--rebuild]", file=sys.stderr)
+        print("Usage: tokei_phase2_lemmas.py <words_db_path> [--rebuild] | --serve [--port N]", file=sys.stderr)
         return 2
 
     words_db_path = Path(argv[1]).expanduser().resolve()
@@ -61,16 +168,9 @@ def main(argv: list[str]) -> int:
         print(f"Words DB not found: {words_db_path}", file=sys.stderr)
         return 2
 
-    try:
-        import spacy  # type: ignore
-    except Exception as e:
-        print(f"spaCy import failed: {type(e).__name__}", file=sys.stderr)
-        return 3
-
-    try:
-        nlp = spacy.load("ja_core_news_md")
-    except Exception as e:
-        print(f"Failed to load model ja_core_news_md: {type(e).__name__}", file=sys.stderr)
+    model_version = _model_version()
+    if model_version is None:
+        print(f"Model package {SPACY_JA_MODEL} is not installed.", file=sys.stderr)
         return 3
 
     con = sqlite3.connect(str(words_db_path))
@@ -81,37 +181,47 @@ def main(argv: list[str]) -> int:
         if rebuild:
             con.execute("DELETE FROM lexeme_lemmas;")
             con.execute("DELETE FROM lemmas;")
-            rows = con.execute(
-                "SELECT id, surface, rule_id FROM lexemes ORDER BY id"
-            ).fetchall()
-        else:
-            rows = con.execute(
-                """
-                SELECT l.id, l.surface, l.rule_id
-                FROM lexemes l
-                LEFT JOIN lexeme_lemmas ll ON ll.lexeme_id = l.id
-                WHERE ll.lexeme_id IS NULL
-                ORDER BY l.id
+        rows = con.execute(
+            f"""
+            SELECT l.id, l.normalized_surface, l.rule_id, lc.lemma
+            FROM lexemes l
+            LEFT JOIN lemma_cache lc
+              ON lc.normalized_surface = l.normalized_surface AND lc.model = ? AND lc.model_version = ?
+            {"" if rebuild else "WHERE NOT EXISTS (SELECT 1 FROM lexeme_lemmas ll WHERE ll.lexeme_id = l.id)"}
+            ORDER BY l.id
+            """,
+            (SPACY_JA_MODEL, model_version),
+        ).fetchall()
+
+        links = [(int(lid), str(cached), str(rid)) for (lid, _surface, rid, cached) in rows if cached is not None]
+        misses = [(int(lid), str(surface), str(rid)) for (lid, surface, rid, cached) in rows if cached is None]
+        link_lexeme_lemmas(con, links)
+        con.commit()
+
+        if misses:
+            try:
+                import spacy  # type: ignore
+            except Exception as e:
+                print(f"spaCy import failed: {type(e).__name__}", file=sys.stderr)
+                return 3
+
+            try:
+                nlp = spacy.load(SPACY_JA_MODEL, disable=list(SPACY_DISABLED_PIPES))
+            except Exception as e:
+                print(f"Failed to load model {SPACY_JA_MODEL}: {type(e).__name__}", file=sys.stderr)
+                return 3
+
+            miss_surfaces = sorted({surface for (_id, surface, _rid) in misses})
+            lemma_by_surface = dict(zip(miss_surfaces, spacy_lemmas_for_surfaces(nlp, miss_surfaces)))
+            con.executemany(
                 """
-            ).fetchall()
-
-        for lexeme_id, surface, rule_id in rows:
-            lemma = _spacy_lemma_for_surface(nlp, str(surface))
-            rid = str(rule_id)
-            con.execute(
-                "INSERT OR IGNORE INTO lemmas(lemma, reading, rule_id) VALUES(?, ?, ?)",
-                (lemma, None, rid),
-            )
-            lemma_id = con.execute(
-                "SELECT id FROM lemmas WHERE lemma=? AND rule_id=?",
-                (lemma, rid),
-            ).fetchone()[0]
-            con.execute(
-                "INSERT OR IGNORE INTO lexeme_lemmas(lexeme_id, lemma_id) VALUES(?, ?)",
-                (int(lexeme_id), int(lemma_id)),
+                INSERT OR REPLACE INTO lemma_cache(normalized_surface, model, model_version, lemma)
+                VALUES(?, ?, ?, ?)
+                """,
+                [(surface, SPACY_JA_MODEL, model_version, lemma) for surface, lemma in lemma_by_surface.items()],
             )
-
-        con.commit()
+            link_lexeme_lemmas(con, [(lid, lemma_by_surface[surface], rid) for (lid, surface, rid) in misses])
+            con.commit()
     finally:
         con.close()
 
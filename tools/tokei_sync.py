@@ -3,29 +3,40 @@ from __future__ import annotations
 import base64
 import csv
 import hashlib
+import itertools
 import json
 import os
 import platform
 import re
+import socket
 import sqlite3
 import subprocess
 import sys
-import unicodedata
+import threading
 from collections import defaultdict
 from dataclasses import dataclass
 from datetime import date, datetime, time, timedelta
 from pathlib import Path
-from typing import Any
+from time import monotonic
+from typing import Any, Callable
 from urllib import error, parse, request
 
 try:
     from tokei_errors import ApiError, ConfigError
-    from utils import get_anki_path, get_gsm_path
+    from utils import get_anki_path, get_gsm_path, get_user_root
 except ModuleNotFoundError:
     _root = Path(__file__).resolve().parents[1]
     sys.path.insert(0, str(_root / "src" / "tokei"))
     from tokei_errors import ApiError, ConfigError
 
+from tokei_lemma_common import (
+    SPACY_DISABLED_PIPES,
+    SPACY_JA_MODEL,
+    link_lexeme_lemmas,
+    normalize_surface,
+    spacy_lemmas_for_surfaces,
+)
+
 try:
     from zoneinfo import ZoneInfo
     from zoneinfo import ZoneInfoNotFoundError
@@ -52,6 +63,8 @@ class Config:
     gsm_enabled: bool
     gsm_db_path: str
     phase2_csv_rule_id: str
+    phase2_lemmatizer: str
+    phase2_deinflect_wordlist: str
     anki_snapshot_enabled: bool
     anki_snapshot_output_dir: str
 
@@ -63,13 +76,15 @@ class TogglMinStartDateError(RuntimeError):
 
 
 _SPACY_NLP: Any | None = None
+# Resident worker started with `tokei_phase2_lemmas.py --serve` (keeps the model warm between syncs).
+_LEMMA_WORKER_DEFAULT_PORT = 8767
+_LEMMA_WORKER_BATCH_SIZE = 2000
+# --rebuild-lemmas commits a checkpoint after each batch of this many lexemes.
+_LEMMA_REBUILD_BATCH_SIZE = 10_000
 
 
 def _normalize_surface_for_identity(surface: str) -> str:
-    s = str(surface or "").strip()
-    s = unicodedata.normalize("NFC", s)
-    s = re.sub(r"\s+", " ", s)
-    return s
+    return normalize_surface(surface)
 
 
 def _content_key_for_lexeme(normalized_surface: str, rule_id: str) -> str:
@@ -92,28 +107,21 @@ def _load_spacy_ja_model() -> Any | None:
     except Exception:
         return None
     try:
-        _SPACY_NLP = spacy.load("ja_core_news_md")
+        _SPACY_NLP = spacy.load(SPACY_JA_MODEL, disable=list(SPACY_DISABLED_PIPES))
     except Exception:
         _SPACY_NLP = None
     return _SPACY_NLP
 
 
-def _spacy_lemma_for_surface(nlp: Any, surface: str) -> str:
-    doc = nlp(surface)
-    for tok in doc:
-        if (
-            getattr(tok, "is_space", False)
-            or getattr(tok, "is_punct", False)
-            or getattr(tok, "is_stop", False)
-        ):
-            continue
-        lemma = str(getattr(tok, "lemma_", "") or "").strip()
-        lemma = unicodedata.normalize("NFC", lemma)
-        if lemma:
-            return lemma
-        break
-    # Deterministic fallback for empty/degenerate cases.
-    return _normalize_surface_for_identity(surface)
+def _spacy_ja_model_version() -> str | None:
+    # Read from package metadata so lemma_cache hits can be served without importing spaCy
+    # or loading the model.
+    try:
+        from importlib import metadata
+
+        return str(metadata.version(SPACY_JA_MODEL))
+    except Exception:
+        return None
 
 
 def _ensure_words_schema(con: sqlite3.Connection) -> None:
@@ -150,6 +158,363 @@ def _ensure_words_schema(con: sqlite3.Connection) -> None:
         )
         """
     )
+    con.execute(
+        """
+        CREATE TABLE IF NOT EXISTS meta (
+          key TEXT PRIMARY KEY,
+          value TEXT NOT NULL
+        )
+        """
+    )
+    # Surface -> lemma results per lemmatizer model. Not derived from rules, so it survives
+    # --rebuild-lemmas and is shared by every rule_id.
+    con.execute(
+        """
+        CREATE TABLE IF NOT EXISTS lemma_cache (
+          normalized_surface TEXT NOT NULL,
+          model TEXT NOT NULL,
+          model_version TEXT NOT NULL,
+          lemma TEXT NOT NULL,
+          PRIMARY KEY (normalized_surface, model, model_version)
+        ) WITHOUT ROWID
+        """
+    )
+    con.execute("CREATE INDEX IF NOT EXISTS idx_lexemes_first_seen ON lexemes(first_seen, rule_id)")
+    con.execute("CREATE INDEX IF NOT EXISTS idx_lexeme_lemmas_lemma ON lexeme_lemmas(lemma_id, lexeme_id)")
+    # Per-day known-word growth, rebuilt by _refresh_word_growth after Phase 2 changes.
+    # rule_id '' is the across-rules series (distinct surfaces/lemmas, not a sum of rules).
+    con.execute(
+        """
+        CREATE TABLE IF NOT EXISTS growth_daily (
+          day DATE NOT NULL,
+          rule_id TEXT NOT NULL,
+          new_surfaces INTEGER NOT NULL,
+          new_lemmas INTEGER NOT NULL,
+          PRIMARY KEY (day, rule_id)
+        ) WITHOUT ROWID
+        """
+    )
+    con.execute("CREATE INDEX IF NOT EXISTS idx_lexemes_normalized_surface ON lexemes(normalized_surface)")
+    _ensure_words_counters(con)
+    _ensure_words_search(con)
+    _ensure_words_kanji(con)
+
+
+_UPSERT_LEXEME_SQL = """
+INSERT INTO lexemes(content_key, surface, normalized_surface, rule_id, first_seen, last_seen)
+VALUES(?, ?, ?, ?, ?, ?)
+ON CONFLICT(content_key) DO UPDATE SET
+  surface = excluded.surface,
+  normalized_surface = excluded.normalized_surface,
+  first_seen = CASE WHEN lexemes.first_seen < excluded.first_seen THEN lexemes.first_seen ELSE excluded.first_seen END,
+  last_seen = CASE WHEN lexemes.last_seen > excluded.last_seen THEN lexemes.last_seen ELSE excluded.last_seen END
+"""
+
+
+def _ensure_words_counters(con: sqlite3.Connection) -> None:
+    """
+    Counter tables kept current by triggers, so known-word totals are O(1) reads whichever
+    script writes lexemes/lemmas. `*_refs` hold per-value reference counts; `word_counters`
+    holds the number of distinct surfaces/lemmas; `rule_counters` the per-rule row counts.
+    """
+    backfill = (
+        con.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='word_counters'").fetchone()
+        is None
+    )
+    con.execute(
+        "CREATE TABLE IF NOT EXISTS word_counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL) WITHOUT ROWID"
+    )
+    con.execute(
+        """
+        CREATE TABLE IF NOT EXISTS surface_refs (
+          normalized_surface TEXT PRIMARY KEY,
+          refs INTEGER NOT NULL
+        ) WITHOUT ROWID
+        """
+    )
+    con.execute(
+        "CREATE TABLE IF NOT EXISTS lemma_refs (lemma TEXT PRIMARY KEY, refs INTEGER NOT NULL) WITHOUT ROWID"
+    )
+    con.execute(
+        """
+        CREATE TABLE IF NOT EXISTS rule_counters (
+          rule_id TEXT PRIMARY KEY,
+          lexemes INTEGER NOT NULL DEFAULT 0,
+          lemmas INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+        """
+    )
+    con.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS lexemes_count_ai AFTER INSERT ON lexemes BEGIN
+          INSERT INTO surface_refs(normalized_surface, refs) VALUES(NEW.normalized_surface, 1)
+            ON CONFLICT(normalized_surface) DO UPDATE SET refs = refs + 1;
+          INSERT INTO rule_counters(rule_id, lexemes) VALUES(NEW.rule_id, 1)
+            ON CONFLICT(rule_id) DO UPDATE SET lexemes = lexemes + 1;
+        END
+        """
+    )
+    con.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS lexemes_count_ad AFTER DELETE ON lexemes BEGIN
+          UPDATE surface_refs SET refs = refs - 1 WHERE normalized_surface = OLD.normalized_surface;
+          DELETE FROM surface_refs WHERE normalized_surface = OLD.normalized_surface AND refs <= 0;
+          UPDATE rule_counters SET lexemes = lexemes - 1 WHERE rule_id = OLD.rule_id;
+        END
+        """
+    )
+    con.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS lexemes_count_au AFTER UPDATE OF normalized_surface, rule_id ON lexemes
+        WHEN OLD.normalized_surface IS NOT NEW.normalized_surface OR OLD.rule_id IS NOT NEW.rule_id
+        BEGIN
+          UPDATE surface_refs SET refs = refs - 1 WHERE normalized_surface = OLD.normalized_surface;
+          DELETE FROM surface_refs WHERE normalized_surface = OLD.normalized_surface AND refs <= 0;
+          UPDATE rule_counters SET lexemes = lexemes - 1 WHERE rule_id = OLD.rule_id;
+          INSERT INTO surface_refs(normalized_surface, refs) VALUES(NEW.normalized_surface, 1)
+            ON CONFLICT(normalized_surface) DO UPDATE SET refs = refs + 1;
+          INSERT INTO rule_counters(rule_id, lexemes) VALUES(NEW.rule_id, 1)
+            ON CONFLICT(rule_id) DO UPDATE SET lexemes = lexemes + 1;
+        END
+        """
+    )
+    con.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS lemmas_count_ai AFTER INSERT ON lemmas BEGIN
+          INSERT INTO lemma_refs(lemma, refs) VALUES(NEW.lemma, 1)
+            ON CONFLICT(lemma) DO UPDATE SET refs = refs + 1;
+          INSERT INTO rule_counters(rule_id, lemmas) VALUES(NEW.rule_id, 1)
+            ON CONFLICT(rule_id) DO UPDATE SET lemmas = lemmas + 1;
+        END
+        """
+    )
+    con.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS lemmas_count_ad AFTER DELETE ON lemmas BEGIN
+          UPDATE lemma_refs SET refs = refs - 1 WHERE lemma = OLD.lemma;
+          DELETE FROM lemma_refs WHERE lemma = OLD.lemma AND refs <= 0;
+          UPDATE rule_counters SET lemmas = lemmas - 1 WHERE rule_id = OLD.rule_id;
+        END
+        """
+    )
+    for table, counter in (("surface_refs", "surfaces"), ("lemma_refs", "lemmas")):
+        con.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_count_ai AFTER INSERT ON {table} BEGIN
+              UPDATE word_counters SET value = value + 1 WHERE name = '{counter}';
+            END
+            """
+        )
+        con.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_count_ad AFTER DELETE ON {table} BEGIN
+              UPDATE word_counters SET value = value - 1 WHERE name = '{counter}';
+            END
+            """
+        )
+        con.execute("INSERT OR IGNORE INTO word_counters(name, value) VALUES(?, 0)", (counter,))
+
+    if backfill:
+        # Existing database from before the counters: seed them once (the *_refs triggers
+        # fill word_counters as rows go in).
+        con.execute(
+            """
+            INSERT INTO surface_refs(normalized_surface, refs)
+            SELECT normalized_surface, COUNT(*) FROM lexemes GROUP BY normalized_surface
+            """
+        )
+        con.execute("INSERT INTO lemma_refs(lemma, refs) SELECT lemma, COUNT(*) FROM lemmas GROUP BY lemma")
+        con.execute(
+            """
+            INSERT INTO rule_counters(rule_id, lexemes, lemmas)
+            SELECT rule_id, SUM(lexemes), SUM(lemmas)
+            FROM (
+              SELECT rule_id, COUNT(*) AS lexemes, 0 AS lemmas FROM lexemes GROUP BY rule_id
+              UNION ALL
+              SELECT rule_id, 0, COUNT(*) FROM lemmas GROUP BY rule_id
+            )
+            GROUP BY rule_id
+            """
+        )
+        con.commit()
+
+
+def _ensure_words_search(con: sqlite3.Connection) -> None:
+    """
+    FTS5 trigram indexes mirroring lexemes.normalized_surface and lemmas.lemma (external
+    content, so no second copy of the text). Inserts only queue the row id in search_pending
+    (per-row FTS writes made bulk imports ~3x slower); `_sync_words_search` indexes the queue
+    in one statement. Deletes/updates go through triggers so the index never points at stale
+    text. Skipped when this SQLite build lacks FTS5 or the trigram tokenizer; `_search_words`
+    then falls back to LIKE.
+    """
+    for fts, table, column in (("lexeme_fts", "lexemes", "normalized_surface"), ("lemma_fts", "lemmas", "lemma")):
+        exists = con.execute("SELECT 1 FROM sqlite_master WHERE name=?", (fts,)).fetchone() is not None
+        if not exists:
+            try:
+                con.execute(
+                    f"""
+                    CREATE VIRTUAL TABLE {fts} USING fts5(
+                      {column}, content='{table}', content_rowid='id', tokenize='trigram'
+                    )
+                    """
+                )
+            except sqlite3.OperationalError:
+                return
+        con.execute(
+            """
+            CREATE TABLE IF NOT EXISTS search_pending (
+              tbl TEXT NOT NULL,
+              id INTEGER NOT NULL,
+              PRIMARY KEY (tbl, id)
+            ) WITHOUT ROWID
+            """
+        )
+        if not exists:
+            con.execute(f"INSERT INTO {fts}({fts}) VALUES('rebuild')")
+            con.execute("DELETE FROM search_pending WHERE tbl=?", (table,))
+            con.commit()
+
+        not_pending = f"NOT EXISTS (SELECT 1 FROM search_pending WHERE tbl = '{table}' AND id = OLD.id)"
+        con.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN
+              INSERT OR IGNORE INTO search_pending(tbl, id) VALUES('{table}', NEW.id);
+            END
+            """
+        )
+        con.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN
+              INSERT INTO {fts}({fts}, rowid, {column}) SELECT 'delete', OLD.id, OLD.{column} WHERE {not_pending};
+              DELETE FROM search_pending WHERE tbl = '{table}' AND id = OLD.id;
+            END
+            """
+        )
+        con.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {column} ON {table}
+            WHEN OLD.{column} IS NOT NEW.{column}
+            BEGIN
+              INSERT INTO {fts}({fts}, rowid, {column}) SELECT 'delete', OLD.id, OLD.{column} WHERE {not_pending};
+              INSERT OR IGNORE INTO search_pending(tbl, id) VALUES('{table}', NEW.id);
+            END
+            """
+        )
+
+
+def _sync_words_search(con: sqlite3.Connection) -> None:
+    if con.execute("SELECT 1 FROM sqlite_master WHERE name='search_pending'").fetchone() is None:
+        return
+    for fts, table, column in (("lexeme_fts", "lexemes", "normalized_surface"), ("lemma_fts", "lemmas", "lemma")):
+        con.execute(
+            f"""
+            INSERT INTO {fts}(rowid, {column})
+            SELECT t.id, t.{column} FROM search_pending p JOIN {table} t ON t.id = p.id
+            WHERE p.tbl = ?
+            """,
+            (table,),
+        )
+        con.execute("DELETE FROM search_pending WHERE tbl=?", (table,))
+
+
+_KANJI_RE = re.compile(r"[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]")
+
+
+def _ensure_words_kanji(con: sqlite3.Connection) -> None:
+    """
+    kanji_stats: each kanji in a known lexeme, with the number of lexemes containing it and the
+    earliest first_seen. Triggers queue signed surface changes in kanji_pending and
+    `_refresh_kanji_stats` folds the queue in, so a sync only touches what changed.
+    """
+    created = (
+        con.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='kanji_stats'").fetchone() is None
+    )
+    con.execute(
+        """
+        CREATE TABLE IF NOT EXISTS kanji_stats (
+          kanji TEXT PRIMARY KEY,
+          first_seen DATE NOT NULL,
+          lexemes INTEGER NOT NULL
+        ) WITHOUT ROWID
+        """
+    )
+    con.execute(
+        """
+        CREATE TABLE IF NOT EXISTS kanji_pending (
+          seq INTEGER PRIMARY KEY,
+          surface TEXT NOT NULL,
+          first_seen DATE NOT NULL,
+          delta INTEGER NOT NULL
+        )
+        """
+    )
+    con.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS lexemes_kanji_ai AFTER INSERT ON lexemes BEGIN
+          INSERT INTO kanji_pending(surface, first_seen, delta) VALUES(NEW.normalized_surface, NEW.first_seen, 1);
+        END
+        """
+    )
+    con.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS lexemes_kanji_ad AFTER DELETE ON lexemes BEGIN
+          INSERT INTO kanji_pending(surface, first_seen, delta) VALUES(OLD.normalized_surface, OLD.first_seen, -1);
+        END
+        """
+    )
+    con.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS lexemes_kanji_au AFTER UPDATE OF normalized_surface, first_seen ON lexemes
+        WHEN OLD.normalized_surface IS NOT NEW.normalized_surface OR OLD.first_seen IS NOT NEW.first_seen
+        BEGIN
+          INSERT INTO kanji_pending(surface, first_seen, delta) VALUES(OLD.normalized_surface, OLD.first_seen, -1);
+          INSERT INTO kanji_pending(surface, first_seen, delta) VALUES(NEW.normalized_surface, NEW.first_seen, 1);
+        END
+        """
+    )
+    if created:
+        con.execute(
+            "INSERT INTO kanji_pending(surface, first_seen, delta) SELECT normalized_surface, first_seen, 1 FROM lexemes"
+        )
+        con.commit()
+
+
+def _refresh_kanji_stats(con: sqlite3.Connection) -> int:
+    row = con.execute("SELECT MAX(seq) FROM kanji_pending").fetchone()
+    max_seq = row[0] if row else None
+    if max_seq is None:
+        return 0
+
+    # kanji -> [lexeme delta, earliest first_seen among added lexemes]
+    changes: dict[str, list[Any]] = {}
+    for surface, first_seen, delta in con.execute(
+        "SELECT surface, first_seen, delta FROM kanji_pending WHERE seq <= ?", (max_seq,)
+    ):
+        for kanji in set(_KANJI_RE.findall(str(surface or ""))):
+            entry = changes.setdefault(kanji, [0, None])
+            entry[0] += int(delta)
+            if int(delta) > 0 and (entry[1] is None or str(first_seen) < entry[1]):
+                entry[1] = str(first_seen)
+
+    con.executemany(
+        """
+        INSERT INTO kanji_stats(kanji, first_seen, lexemes) VALUES(?, ?, ?)
+        ON CONFLICT(kanji) DO UPDATE SET
+          lexemes = kanji_stats.lexemes + excluded.lexemes,
+          first_seen = MIN(kanji_stats.first_seen, excluded.first_seen)
+        """,
+        [(k, first, delta) for k, (delta, first) in changes.items() if first is not None],
+    )
+    # Only removals: no first_seen to offer. (A removal never moves first_seen later; the
+    # earliest date stays until the kanji drops out entirely.)
+    con.executemany(
+        "UPDATE kanji_stats SET lexemes = lexemes + ? WHERE kanji = ?",
+        [(delta, k) for k, (delta, first) in changes.items() if first is None and delta],
+    )
+    con.execute("DELETE FROM kanji_stats WHERE lexemes <= 0")
+    con.execute("DELETE FROM kanji_pending WHERE seq <= ?", (max_seq,))
+    return len(changes)
 
 
 def _upsert_lexeme(
@@ -163,15 +528,7 @@ def _upsert_lexeme(
     last_seen: str,
 ) -> None:
     con.execute(
-        """
-        INSERT INTO lexemes(content_key, surface, normalized_surface, rule_id, first_seen, last_seen)
-        VALUES(?, ?, ?, ?, ?, ?)
-        ON CONFLICT(content_key) DO UPDATE SET
-          surface = excluded.surface,
-          normalized_surface = excluded.normalized_surface,
-          first_seen = CASE WHEN lexemes.first_seen < excluded.first_seen THEN lexemes.first_seen ELSE excluded.first_seen END,
-          last_seen = CASE WHEN lexemes.last_seen > excluded.last_seen THEN lexemes.last_seen ELSE excluded.last_seen END
-        """,
+        _UPSERT_LEXEME_SQL,
         (content_key, surface, normalized_surface, rule_id, first_seen, last_seen),
     )
 
@@ -241,6 +598,20 @@ def _resolve_hashi_known_words_db(cfg: Config) -> Path | None:
     return db_path if db_path.exists() else None
 
 
+def _hashi_surface_sql(surface: Any, normalized_surface: Any) -> str:
+    extracted = _extract_bolded_term(str(surface or "")) or _extract_bolded_term(str(normalized_surface or ""))
+    return _normalize_surface_for_identity(extracted or str(surface or ""))
+
+
+def _hashi_normalized_sql(surface: Any, normalized_surface: Any) -> str:
+    extracted = _extract_bolded_term(str(surface or "")) or _extract_bolded_term(str(normalized_surface or ""))
+    if extracted:
+        return _normalize_surface_for_identity(extracted)
+    return _normalize_surface_for_identity(
+        str(normalized_surface or "") or _normalize_surface_for_identity(str(surface or ""))
+    )
+
+
 def _phase2_import_hashi_lexemes(
     con: sqlite3.Connection,
     *,
@@ -251,45 +622,192 @@ def _phase2_import_hashi_lexemes(
     if src_db is None:
         return 0
 
-    imported = 0
-    src_con = sqlite3.connect(f"file:{src_db}?mode=ro", uri=True)
+    # Only rows that changed since the previous import are read. Tokei's exporter records
+    # presence as intervals, so that is new rowids, intervals opened after the last imported
+    # snapshot date (or on it, when that snapshot was re-exported) and intervals closed on or
+    # after it (a drop closes the interval at the previous snapshot date, which can be the mark
+    # itself); each is an index range scan unioned into id lookups, and last_seen comes from
+    # the lexemes_current view. Files without it (Hashi's own exporter)
+    # fall back to new rowids plus rows whose last_seen moved past the mark. A different source
+    # file, or one that shrank (recreated export), starts over.
+    source = str(src_db.resolve())
+    last_rowid = 0
+    last_mark = ""
+    if _get_meta(con, "hashi_import_source") == source:
+        try:
+            last_rowid = int(_get_meta(con, "hashi_import_rowid") or 0)
+        except ValueError:
+            last_rowid = 0
+        last_mark = _get_meta(con, "hashi_import_last_seen") or ""
+
+    con.create_function("tokei_hashi_surface", 2, _hashi_surface_sql, deterministic=True)
+    con.create_function("tokei_hashi_normalized", 2, _hashi_normalized_sql, deterministic=True)
+
+    # ATTACH/DETACH are refused inside a transaction.
+    con.commit()
+    con.execute("ATTACH DATABASE ? AS hashi", (f"file:{src_db}?mode=ro",))
     try:
-        rows = src_con.execute(
-            "SELECT content_key, surface, normalized_surface, rule_id, first_seen, last_seen FROM lexemes"
-        ).fetchall()
-        for content_key, surface, normalized_surface, rule_id, first_seen, last_seen in rows:
-            extracted = _extract_bolded_term(surface) or _extract_bolded_term(normalized_surface)
-            if extracted:
-                surface = extracted
-                normalized_surface = extracted
-
-            surface_s = _normalize_surface_for_identity(str(surface))
-            normalized_s = _normalize_surface_for_identity(str(normalized_surface or surface_s))
-            if not normalized_s:
-                continue
+        has_presence = (
+            con.execute(
+                "SELECT 1 FROM hashi.sqlite_master WHERE type = 'view' AND name = 'lexemes_current'"
+            ).fetchone()
+            is not None
+        )
+        kind = "presence" if has_presence else "last_seen"
+        max_rowid = int(con.execute("SELECT MAX(rowid) FROM hashi.lexemes").fetchone()[0] or 0)
+        if has_presence:
+            max_mark = con.execute("SELECT MAX(snapshot_date) FROM hashi.snapshot_dates").fetchone()[0]
+        else:
+            max_mark = con.execute("SELECT MAX(last_seen) FROM hashi.lexemes").fetchone()[0]
+        max_mark = str(max_mark or "")
+        if max_rowid < last_rowid or _get_meta(con, "hashi_import_kind") != kind:
+            last_rowid = 0
+            last_mark = ""
+
+        if has_presence:
+            src_table = "hashi.lexemes_current"
+            opened_op = ">=" if max_mark == last_mark else ">"
+            changed = f"""
+                SELECT id FROM hashi.lexemes WHERE id > :rowid
+                UNION
+                SELECT lexeme_id FROM hashi.lexeme_presence WHERE from_date {opened_op} :mark
+                UNION
+                SELECT lexeme_id FROM hashi.lexeme_presence WHERE to_date >= :mark
+            """
+        else:
+            src_table = "hashi.lexemes"
+            changed = """
+                SELECT rowid FROM hashi.lexemes WHERE rowid > :rowid
+                UNION
+                SELECT rowid FROM hashi.lexemes WHERE last_seen > :mark
+            """
 
-            _upsert_lexeme(
-                con,
-                content_key=str(content_key),
-                surface=surface_s,
-                normalized_surface=normalized_s,
-                rule_id=str(rule_id),
-                first_seen=str(first_seen or today.isoformat()),
-                last_seen=str(last_seen or today.isoformat()),
+        today_s = today.isoformat()
+        cur = con.execute(
+            f"""
+            INSERT INTO lexemes(content_key, surface, normalized_surface, rule_id, first_seen, last_seen)
+            SELECT content_key, surface_s, normalized_s, rule_id, first_seen, last_seen
+            FROM (
+              SELECT
+                CAST(content_key AS TEXT) AS content_key,
+                tokei_hashi_surface(surface, normalized_surface) AS surface_s,
+                tokei_hashi_normalized(surface, normalized_surface) AS normalized_s,
+                CAST(rule_id AS TEXT) AS rule_id,
+                COALESCE(NULLIF(CAST(first_seen AS TEXT), ''), :today) AS first_seen,
+                COALESCE(NULLIF(CAST(last_seen AS TEXT), ''), :today) AS last_seen
+              FROM {src_table}
+              WHERE {"id" if has_presence else "rowid"} IN ({changed})
             )
-            imported += 1
+            WHERE normalized_s != ''
+            ON CONFLICT(content_key) DO UPDATE SET
+              surface = excluded.surface,
+              normalized_surface = excluded.normalized_surface,
+              first_seen = CASE WHEN lexemes.first_seen < excluded.first_seen THEN lexemes.first_seen ELSE excluded.first_seen END,
+              last_seen = CASE WHEN lexemes.last_seen > excluded.last_seen THEN lexemes.last_seen ELSE excluded.last_seen END
+            """,
+            {"today": today_s, "rowid": last_rowid, "mark": last_mark},
+        )
+        imported = max(0, int(cur.rowcount))
+
+        _set_meta(con, "hashi_import_source", source)
+        _set_meta(con, "hashi_import_kind", kind)
+        _set_meta(con, "hashi_import_rowid", str(max_rowid))
+        _set_meta(con, "hashi_import_last_seen", max_mark)
+        con.commit()
     finally:
-        src_con.close()
+        if con.in_transaction:
+            con.rollback()
+        con.execute("DETACH DATABASE hashi")
     return imported
 
 
-def _phase2_ingest_known_csv(
-    con: sqlite3.Connection,
-    *,
-    root: Path,
-    today: date,
-    rule_id: str,
-) -> int:
+_CSV_INGEST_BATCH_SIZE = 5000
+
+_CSV_HEADER_WORDS = frozenset(
+    {
+        "word",
+        "words",
+        "surface",
+        "expression",
+        "lexeme",
+        "lemma",
+        "lemmas",
+        "dictform",
+        "dict_form",
+        "dictionaryform",
+    }
+)
+_CSV_HEADER_HINTS = (
+    "word",
+    "surface",
+    "expression",
+    "lexeme",
+    "lemma",
+    "morph",
+    "dictform",
+    "dict_form",
+    "hascard",
+    "reading",
+    "translation",
+)
+_JAPANESE_CHAR_RE = re.compile(r"[\u3040-\u30ff\u3400-\u9fff]")
+
+
+def _csv_first_cell(row: list[str]) -> str:
+    return _normalize_surface_for_identity(row[0] if row else "")
+
+
+def _looks_like_csv_header_row(row: list[str], next_first: str) -> bool:
+    first = _csv_first_cell(row)
+    if not first:
+        return False
+
+    first_lc = first.lower()
+    if first_lc in _CSV_HEADER_WORDS:
+        return True
+
+    if re.search(r"[a-z]", first_lc) and any(k in first_lc for k in _CSV_HEADER_HINTS):
+        return True
+
+    if len(row) > 1:
+        rest = _normalize_surface_for_identity(" ".join(str(x or "") for x in row[1:]))
+        if (
+            re.search(r"[A-Za-z]", first)
+            and re.search(r"[A-Za-z]", rest)
+            and not _JAPANESE_CHAR_RE.search(first)
+            and not _JAPANESE_CHAR_RE.search(rest)
+        ):
+            return True
+
+    if re.search(r"[A-Za-z]", first) and not _JAPANESE_CHAR_RE.search(first):
+        if next_first and _JAPANESE_CHAR_RE.search(next_first):
+            return True
+
+    return False
+
+
+def _split_csv_header_rows(reader: Any) -> tuple[list[list[str]], list[list[str]]]:
+    """Consume leading header rows; returns (headers, buffered data rows to process first)."""
+    headers: list[list[str]] = []
+    lead: list[list[str]] = []
+    eof = False
+    while True:
+        # Buffer up to the next row with a non-empty first cell after lead[0] (header checks
+        # look one value ahead); only blank rows sit in between, so this stays small.
+        while not eof and (not lead or not any(_csv_first_cell(r) for r in lead[1:])):
+            try:
+                lead.append(next(reader))
+            except StopIteration:
+                eof = True
+        if not lead:
+            return headers, lead
+        next_first = next((c for c in (_csv_first_cell(r) for r in lead[1:]) if c), "")
+        if not _looks_like_csv_header_row(lead[0], next_first):
+            return headers, lead
+        headers.append(lead.pop(0))
+
+
+def _phase2_csv_paths(root: Path) -> list[Path]:
     data_dir = root / "data"
     csv_paths: list[Path] = []
     if data_dir.is_dir():
@@ -302,93 +820,35 @@ def _phase2_ingest_known_csv(
             root / "known.csv",
         ]
         csv_paths = [p for p in legacy_candidates if p.exists()]
+    return csv_paths
 
+
+def _phase2_ingest_known_csv(
+    con: sqlite3.Connection,
+    *,
+    root: Path,
+    today: date,
+    rule_id: str,
+) -> int:
+    csv_paths = _phase2_csv_paths(root)
     if not csv_paths:
         return 0
 
+    day_s = today.isoformat()
     inserted = 0
     for csv_path in csv_paths:
+        # Rows are streamed and upserted in batches, one transaction per file; a file that
+        # fails to read part-way is rolled back as a whole.
+        file_inserted = 0
         try:
             with csv_path.open("r", encoding="utf-8-sig", newline="") as f:
                 reader = csv.reader(f)
-                rows = list(reader)
-        except Exception:
-            continue
+                headers, lead = _split_csv_header_rows(reader)
 
-        def _has_japanese_chars(value: str) -> bool:
-            return bool(re.search(r"[\u3040-\u30ff\u3400-\u9fff]", value))
-
-        def _next_nonempty_first(start: int) -> str:
-            for r in rows[start:]:
-                cell = _normalize_surface_for_identity(r[0] if r else "")
-                if cell:
-                    return cell
-            return ""
-
-        def _looks_like_header_row(idx: int) -> bool:
-            r = rows[idx]
-            first = _normalize_surface_for_identity(r[0] if r else "")
-            if not first:
-                return False
-
-            first_lc = first.lower()
-            header_words = {
-                "word",
-                "words",
-                "surface",
-                "expression",
-                "lexeme",
-                "lemma",
-                "lemmas",
-                "dictform",
-                "dict_form",
-                "dictionaryform",
-            }
-            if first_lc in header_words:
-                return True
-
-            if re.search(r"[a-z]", first_lc) and any(
-                k in first_lc
-                for k in (
-                    "word",
-                    "surface",
-                    "expression",
-                    "lexeme",
-                    "lemma",
-                    "morph",
-                    "dictform",
-                    "dict_form",
-                    "hascard",
-                    "reading",
-                    "translation",
-                )
-            ):
-                return True
-
-            if len(r) > 1:
-                rest = _normalize_surface_for_identity(" ".join(str(x or "") for x in r[1:]))
-                if (
-                    re.search(r"[A-Za-z]", first)
-                    and re.search(r"[A-Za-z]", rest)
-                    and not _has_japanese_chars(first)
-                    and not _has_japanese_chars(rest)
-                ):
-                    return True
-
-            if re.search(r"[A-Za-z]", first) and not _has_japanese_chars(first):
-                next_first = _next_nonempty_first(idx + 1)
-                if next_first and _has_japanese_chars(next_first):
-                    return True
-
-            return False
-
-        start_idx = 0
-        while start_idx < len(rows) and _looks_like_header_row(start_idx):
-            header_surface = _normalize_surface_for_identity(
-                rows[start_idx][0] if rows[start_idx] else ""
-            )
-            if header_surface:
-                try:
+                for header in headers:
+                    header_surface = _csv_first_cell(header)
+                    if not header_surface:
+                        continue
                     header_key = _content_key_for_lexeme(header_surface, rule_id)
                     row = con.execute(
                         "SELECT id FROM lexemes WHERE content_key=? LIMIT 1", (header_key,)
@@ -397,77 +857,320 @@ def _phase2_ingest_known_csv(
                         lexeme_id = int(row[0])
                         con.execute("DELETE FROM lexeme_lemmas WHERE lexeme_id=?", (lexeme_id,))
                         con.execute("DELETE FROM lexemes WHERE id=?", (lexeme_id,))
-                except Exception:
-                    pass
-            start_idx += 1
 
-        day_s = today.isoformat()
-        for row in rows[start_idx:]:
-            surface_raw = row[0] if row else ""
-            surface = _normalize_surface_for_identity(surface_raw)
-            if not surface:
-                continue
-            key = _content_key_for_lexeme(surface, rule_id)
-            _upsert_lexeme(
-                con,
-                content_key=key,
-                surface=surface,
-                normalized_surface=surface,
-                rule_id=rule_id,
-                first_seen=day_s,
-                last_seen=day_s,
+                batch: list[str] = []
+
+                def _flush() -> None:
+                    con.executemany(
+                        _UPSERT_LEXEME_SQL,
+                        [
+                            (_content_key_for_lexeme(s, rule_id), s, s, rule_id, day_s, day_s)
+                            for s in batch
+                        ],
+                    )
+                    batch.clear()
+
+                for row in itertools.chain(lead, reader):
+                    surface = _csv_first_cell(row)
+                    if not surface:
+                        continue
+                    batch.append(surface)
+                    file_inserted += 1
+                    if len(batch) >= _CSV_INGEST_BATCH_SIZE:
+                        _flush()
+                if batch:
+                    _flush()
+            con.commit()
+        except Exception:
+            con.rollback()
+            continue
+        inserted += file_inserted
+
+    return inserted
+
+
+def _phase2_build_lemmas(
+    con: sqlite3.Connection,
+    *,
+    rebuild: bool,
+) -> int:
+    if rebuild:
+        _start_lemma_rebuild(con)
+
+    model_version = _spacy_ja_model_version()
+    if model_version is None:
+        # Nothing to checkpoint here: the worker / external builder fill in every unlinked lexeme.
+        con.execute("DELETE FROM meta WHERE key='lemma_rebuild_after_id'")
+        return 0
+
+    def _lemmatize(surfaces: list[str]) -> list[str] | None:
+        nlp = _load_spacy_ja_model()
+        return spacy_lemmas_for_surfaces(nlp, surfaces) if nlp is not None else None
+
+    if _get_meta(con, "lemma_rebuild_after_id") is not None:
+        return _rebuild_lemmas_checkpointed(
+            con, model=SPACY_JA_MODEL, model_version=model_version, lemmatize=_lemmatize
+        )
+    return _link_lemmas_with_cache(
+        con,
+        model=SPACY_JA_MODEL,
+        model_version=model_version,
+        lemmatize=_lemmatize,
+        only_missing=True,
+    )
+
+
+def _start_lemma_rebuild(con: sqlite3.Connection) -> None:
+    con.execute("DELETE FROM lexeme_lemmas;")
+    con.execute("DELETE FROM lemmas;")
+    _set_meta(con, "lemma_rebuild_after_id", "0")
+    con.commit()
+
+
+def _rebuild_lemmas_checkpointed(
+    con: sqlite3.Connection,
+    *,
+    model: str,
+    model_version: str,
+    lemmatize: Callable[[list[str]], list[str | None] | None],
+) -> int:
+    """
+    Relink lexemes in id order, _LEMMA_REBUILD_BATCH_SIZE at a time, committing the last
+    processed id to meta after each batch. An interrupted rebuild resumes from there.
+    """
+    after_id = int(_get_meta(con, "lemma_rebuild_after_id") or 0)
+    remaining = int(con.execute("SELECT COUNT(*) FROM lexemes WHERE id > ?", (after_id,)).fetchone()[0] or 0)
+    if after_id:
+        print(f"Phase 2: resuming lemma rebuild after lexeme id {after_id} ({remaining} left)", file=sys.stderr)
+
+    linked = 0
+    done = 0
+    started = monotonic()
+    while True:
+        row = con.execute(
+            "SELECT MAX(id) FROM (SELECT id FROM lexemes WHERE id > ? ORDER BY id LIMIT ?)",
+            (after_id, _LEMMA_REBUILD_BATCH_SIZE),
+        ).fetchone()
+        batch_end = row[0] if row else None
+        if batch_end is None:
+            break
+        linked += _link_lemmas_with_cache(
+            con,
+            model=model,
+            model_version=model_version,
+            lemmatize=lemmatize,
+            only_missing=False,
+            id_range=(after_id, int(batch_end)),
+        )
+        done += int(
+            con.execute("SELECT COUNT(*) FROM lexemes WHERE id > ? AND id <= ?", (after_id, batch_end)).fetchone()[0]
+        )
+        after_id = int(batch_end)
+        _set_meta(con, "lemma_rebuild_after_id", str(after_id))
+        con.commit()
+        rate = done / max(monotonic() - started, 1e-6)
+        print(f"Phase 2: rebuilt lemmas for {done}/{remaining} lexemes ({rate:,.0f} lexemes/s)", file=sys.stderr)
+
+    con.execute("DELETE FROM meta WHERE key='lemma_rebuild_after_id'")
+    con.commit()
+    return linked
+
+
+def _link_lemmas_with_cache(
+    con: sqlite3.Connection,
+    *,
+    model: str,
+    model_version: str,
+    lemmatize: Callable[[list[str]], list[str | None] | None],
+    only_missing: bool,
+    id_range: tuple[int, int] | None = None,
+) -> int:
+    """
+    Link lexemes to lemmas, resolving normalized surfaces from lemma_cache first and calling
+    `lemmatize` only for cache misses. If `lemmatize` returns None (backend unavailable),
+    only the cache hits are linked; surfaces it returns None for (the deinflector's
+    unresolved forms) are neither cached nor linked. `id_range` = (after_id, last_id)
+    limits the lexemes.
+    """
+    where: list[str] = []
+    params: list[Any] = [model, model_version]
+    if only_missing:
+        where.append("NOT EXISTS (SELECT 1 FROM lexeme_lemmas ll WHERE ll.lexeme_id = l.id)")
+    if id_range is not None:
+        where.append("l.id > ? AND l.id <= ?")
+        params.extend(id_range)
+    lexeme_rows = con.execute(
+        f"""
+        SELECT l.id, l.normalized_surface, l.rule_id, lc.lemma
+        FROM lexemes l
+        LEFT JOIN lemma_cache lc
+          ON lc.normalized_surface = l.normalized_surface AND lc.model = ? AND lc.model_version = ?
+        {"WHERE " + " AND ".join(where) if where else ""}
+        ORDER BY l.id
+        """,
+        params,
+    ).fetchall()
+
+    links: list[tuple[int, str, str]] = []
+    misses: list[tuple[int, str, str]] = []
+    for lexeme_id, surface, rule_id, cached in lexeme_rows:
+        if cached is not None:
+            links.append((int(lexeme_id), str(cached), str(rule_id)))
+        else:
+            misses.append((int(lexeme_id), str(surface), str(rule_id)))
+
+    if misses:
+        miss_surfaces = sorted({surface for (_id, surface, _rid) in misses})
+        lemmas = lemmatize(miss_surfaces)
+        if lemmas is not None:
+            lemma_by_surface = {
+                surface: _normalize_surface_for_identity(lemma)
+                for surface, lemma in zip(miss_surfaces, lemmas)
+                if lemma is not None
+            }
+            con.executemany(
+                """
+                INSERT OR REPLACE INTO lemma_cache(normalized_surface, model, model_version, lemma)
+                VALUES(?, ?, ?, ?)
+                """,
+                [(surface, model, model_version, lemma) for surface, lemma in lemma_by_surface.items()],
+            )
+            links.extend(
+                (lid, lemma_by_surface[surface], rid) for (lid, surface, rid) in misses if surface in lemma_by_surface
             )
-            inserted += 1
 
-    return inserted
+    return link_lexeme_lemmas(con, links)
+
+
+def _phase2_build_lemmas_deinflect(
+    con: sqlite3.Connection,
+    *,
+    rebuild: bool,
+    wordlist_path: Path | None,
+) -> int:
+    from tokei_deinflect import DEINFLECT_MODEL, load_deinflector
+
+    if rebuild:
+        _start_lemma_rebuild(con)
+
+    deinflector = load_deinflector(wordlist_path)
+    if _get_meta(con, "lemma_rebuild_after_id") is not None:
+        return _rebuild_lemmas_checkpointed(
+            con, model=DEINFLECT_MODEL, model_version=deinflector.version, lemmatize=deinflector.lemmatize_many
+        )
+    return _link_lemmas_with_cache(
+        con,
+        model=DEINFLECT_MODEL,
+        model_version=deinflector.version,
+        lemmatize=deinflector.lemmatize_many,
+        only_missing=True,
+    )
+
+
+def _lemma_worker_port() -> int:
+    raw = os.environ.get("TOKEI_LEMMA_WORKER_PORT")
+    try:
+        return int(raw.strip()) if raw and raw.strip() else _LEMMA_WORKER_DEFAULT_PORT
+    except ValueError:
+        return _LEMMA_WORKER_DEFAULT_PORT
+
+
+def _lemma_worker_request(payload: dict[str, Any], *, timeout_s: float) -> dict[str, Any] | None:
+    """
+    Send one JSON-lines request to the resident lemma worker (tokei_phase2_lemmas.py --serve).
+    Returns None when no worker is listening or the reply is not ok.
+    """
+    try:
+        with socket.create_connection(("127.0.0.1", _lemma_worker_port()), timeout=0.25) as sock:
+            sock.settimeout(timeout_s)
+            sock.sendall((json.dumps(payload, ensure_ascii=False) + "\n").encode("utf-8"))
+            with sock.makefile("rb") as f:
+                line = f.readline()
+    except OSError:
+        return None
+    try:
+        resp = json.loads(line.decode("utf-8"))
+    except ValueError:
+        return None
+    return resp if isinstance(resp, dict) and resp.get("ok") else None
+
 
+def _phase2_build_lemmas_via_worker(con: sqlite3.Connection) -> int | None:
+    info = _lemma_worker_request({"op": "ping"}, timeout_s=2.0)
+    if info is None:
+        return None
+    model = str(info.get("model") or "")
+    model_version = str(info.get("model_version") or "")
+    if not model or not model_version:
+        return None
 
-def _phase2_build_lemmas(
-    con: sqlite3.Connection,
-    *,
-    rebuild: bool,
-) -> int:
-    if rebuild:
-        con.execute("DELETE FROM lexeme_lemmas;")
-        con.execute("DELETE FROM lemmas;")
+    def _lemmatize(surfaces: list[str]) -> list[str] | None:
+        out: list[str] = []
+        for i in range(0, len(surfaces), _LEMMA_WORKER_BATCH_SIZE):
+            chunk = surfaces[i : i + _LEMMA_WORKER_BATCH_SIZE]
+            resp = _lemma_worker_request({"op": "lemmatize", "surfaces": chunk}, timeout_s=120.0)
+            lemmas = resp.get("lemmas") if resp else None
+            if not isinstance(lemmas, list) or len(lemmas) != len(chunk):
+                return None
+            out.extend(str(x or "") for x in lemmas)
+        return out
 
-    nlp = _load_spacy_ja_model()
-    if nlp is None:
-        return 0
+    return _link_lemmas_with_cache(
+        con, model=model, model_version=model_version, lemmatize=_lemmatize, only_missing=True
+    )
 
-    if rebuild:
-        lexeme_rows = con.execute("SELECT id, surface, rule_id FROM lexemes ORDER BY id").fetchall()
-    else:
-        lexeme_rows = con.execute(
-            """
-            SELECT l.id, l.surface, l.rule_id
-            FROM lexemes l
-            LEFT JOIN lexeme_lemmas ll ON ll.lexeme_id = l.id
-            WHERE ll.lexeme_id IS NULL
-            ORDER BY l.id
-            """
-        ).fetchall()
 
-    linked = 0
-    for lexeme_id, surface, rule_id in lexeme_rows:
-        lemma = _spacy_lemma_for_surface(nlp, str(surface))
-        lemma = _normalize_surface_for_identity(lemma)
-        rid = str(rule_id)
-        con.execute(
-            "INSERT OR IGNORE INTO lemmas(lemma, reading, rule_id) VALUES(?, ?, ?)",
-            (lemma, None, rid),
-        )
-        lemma_id = con.execute(
-            "SELECT id FROM lemmas WHERE lemma=? AND rule_id=?",
-            (lemma, rid),
-        ).fetchone()[0]
-        con.execute(
-            "INSERT OR IGNORE INTO lexeme_lemmas(lexeme_id, lemma_id) VALUES(?, ?)",
-            (int(lexeme_id), int(lemma_id)),
+def _refresh_word_growth(con: sqlite3.Connection) -> None:
+    # A lemma is "new" on the first_seen day of the earliest lexeme linked to it.
+    con.execute("DELETE FROM growth_daily")
+    con.execute(
+        """
+        INSERT INTO growth_daily(day, rule_id, new_surfaces, new_lemmas)
+        SELECT day, rule_id, SUM(new_surfaces), SUM(new_lemmas)
+        FROM (
+          SELECT first_seen AS day, rule_id, COUNT(*) AS new_surfaces, 0 AS new_lemmas
+          FROM lexemes
+          GROUP BY first_seen, rule_id
+          UNION ALL
+          SELECT day, '', COUNT(*), 0
+          FROM (SELECT MIN(first_seen) AS day FROM lexemes GROUP BY normalized_surface)
+          GROUP BY day
+          UNION ALL
+          SELECT day, rule_id, 0, COUNT(*)
+          FROM (
+            SELECT m.rule_id AS rule_id, MIN(l.first_seen) AS day
+            FROM lemmas m
+            JOIN lexeme_lemmas ll ON ll.lemma_id = m.id
+            JOIN lexemes l ON l.id = ll.lexeme_id
+            GROUP BY m.id
+          )
+          GROUP BY day, rule_id
+          UNION ALL
+          SELECT day, '', 0, COUNT(*)
+          FROM (
+            SELECT MIN(l.first_seen) AS day
+            FROM lemmas m
+            JOIN lexeme_lemmas ll ON ll.lemma_id = m.id
+            JOIN lexemes l ON l.id = ll.lexeme_id
+            GROUP BY m.lemma
+          )
+          GROUP BY day
         )
-        linked += 1
+        GROUP BY day, rule_id
+        """
+    )
 
-    return linked
+
+def _count_missing_lemma_links(con: sqlite3.Connection) -> int:
+    row = con.execute(
+        """
+        SELECT COUNT(*)
+        FROM lexemes l
+        LEFT JOIN lexeme_lemmas ll ON ll.lexeme_id = l.id
+        WHERE ll.lexeme_id IS NULL
+        """
+    ).fetchone()
+    return int(row[0] or 0) if row else 0
 
 
 def _run_external_lemma_builder(root: Path, words_db_path: Path, rebuild: bool) -> bool:
@@ -502,6 +1205,178 @@ def _run_external_lemma_builder(root: Path, words_db_path: Path, rebuild: bool)
         print(f"Phase 2 external lemma builder failed: {msg}", file=sys.stderr)
         return False
     return True
+
+
+# Bump when Phase 2 starts producing something new from the same inputs, so the gate below
+# doesn't skip the first run after an upgrade.
+_PHASE2_INPUTS_VERSION = 3
+
+
+def _sha256_file(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _phase2_deinflect_wordlist_path(root: Path, cfg: Config) -> Path | None:
+    if not cfg.phase2_deinflect_wordlist:
+        return None
+    wordlist_path = Path(cfg.phase2_deinflect_wordlist)
+    return wordlist_path if wordlist_path.is_absolute() else root / wordlist_path
+
+
+def _phase2_inputs(previous: dict[str, Any], *, root: Path, cfg: Config) -> dict[str, Any]:
+    """
+    Fingerprint everything Phase 2 reads. Files are hashed only when their size/mtime differ
+    from the `previous` fingerprint, so an unchanged run costs a few stat() calls.
+    """
+    previous_files = previous.get("files") if isinstance(previous.get("files"), dict) else {}
+
+    if cfg.phase2_lemmatizer == "deinflect":
+        from tokei_deinflect import DEINFLECT_VERSION
+
+        lemmatizer = f"deinflect:{DEINFLECT_VERSION}"
+    else:
+        lemmatizer = f"spacy:{SPACY_JA_MODEL}:{_spacy_ja_model_version() or 'external'}"
+
+    paths: dict[str, Path] = {}
+    hashi_db = _resolve_hashi_known_words_db(cfg)
+    if hashi_db is not None:
+        paths["known_words.sqlite"] = hashi_db
+    for csv_path in _phase2_csv_paths(root):
+        try:
+            paths[csv_path.relative_to(root).as_posix()] = csv_path
+        except ValueError:
+            paths[str(csv_path)] = csv_path
+    wordlist_path = _phase2_deinflect_wordlist_path(root, cfg)
+    if cfg.phase2_lemmatizer == "deinflect" and wordlist_path is not None and wordlist_path.is_file():
+        paths["phase2.deinflect_wordlist"] = wordlist_path
+
+    files: dict[str, dict[str, Any]] = {}
+    for name, path in paths.items():
+        try:
+            st = path.stat()
+        except OSError:
+            continue
+        fp: dict[str, Any] = {"path": str(path), "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+        prev = previous_files.get(name)
+        if (
+            isinstance(prev, dict)
+            and prev.get("path") == fp["path"]
+            and prev.get("size") == fp["size"]
+            and prev.get("mtime_ns") == fp["mtime_ns"]
+            and prev.get("sha256")
+        ):
+            fp["sha256"] = prev["sha256"]
+        else:
+            fp["sha256"] = _sha256_file(path)
+        files[name] = fp
+
+    return {
+        "version": _PHASE2_INPUTS_VERSION,
+        "params": {"csv_rule_id": cfg.phase2_csv_rule_id, "lemmatizer": lemmatizer},
+        "files": files,
+    }
+
+
+def _phase2_changed_inputs(previous: dict[str, Any], current: dict[str, Any]) -> list[str]:
+    if not previous:
+        return ["first run"]
+    if previous.get("version") != current["version"]:
+        return ["tokei version"]
+    changed: list[str] = []
+    prev_params = previous.get("params") if isinstance(previous.get("params"), dict) else {}
+    for name, value in current["params"].items():
+        if prev_params.get(name) != value:
+            changed.append(name)
+    prev_files = previous.get("files") if isinstance(previous.get("files"), dict) else {}
+    for name, fp in current["files"].items():
+        prev = prev_files.get(name)
+        if not isinstance(prev, dict) or prev.get("path") != fp["path"] or prev.get("sha256") != fp["sha256"]:
+            changed.append(name)
+    changed.extend(f"{name} (removed)" for name in prev_files if name not in current["files"])
+    return changed
+
+
+def _run_phase2(*, root: Path, cache_dir: Path, cfg: Config, tz: Any, rebuild_lemmas: bool) -> None:
+    try:
+        today_for_phase2 = datetime.now(tz).date()
+        words_db_path = cache_dir / "tokei_words.sqlite"
+        # URI mode so the Hashi import can ATTACH its source with ?mode=ro.
+        words_con = sqlite3.connect(f"file:{words_db_path}", uri=True)
+        try:
+            words_con.execute("PRAGMA journal_mode=DELETE;")
+            words_con.execute("PRAGMA synchronous=NORMAL;")
+            _ensure_words_schema(words_con)
+
+            try:
+                previous_inputs = json.loads(_get_meta(words_con, "phase2_inputs") or "{}")
+            except ValueError:
+                previous_inputs = {}
+            if not isinstance(previous_inputs, dict):
+                previous_inputs = {}
+            inputs = _phase2_inputs(previous_inputs, root=root, cfg=cfg)
+            changed_inputs = _phase2_changed_inputs(previous_inputs, inputs)
+            if _get_meta(words_con, "lemma_rebuild_after_id") is not None:
+                changed_inputs.append("interrupted lemma rebuild")
+            if not changed_inputs and not rebuild_lemmas:
+                # Nothing to import, but rows written since the last full run may still be queued.
+                _sync_words_search(words_con)
+                words_con.commit()
+                if inputs != previous_inputs:
+                    # Touched but identical content: remember the new mtimes so we don't rehash.
+                    _set_meta(words_con, "phase2_inputs", json.dumps(inputs, sort_keys=True))
+                    words_con.commit()
+                return
+            reasons = (["--rebuild-lemmas"] if rebuild_lemmas else []) + changed_inputs
+            print(f"Phase 2: updating ({', '.join(reasons)})", file=sys.stderr)
+
+            _phase2_import_hashi_lexemes(words_con, cfg=cfg, today=today_for_phase2)
+            _phase2_ingest_known_csv(
+                words_con,
+                root=root,
+                today=today_for_phase2,
+                rule_id=cfg.phase2_csv_rule_id,
+            )
+
+            missing_lemmas = _count_missing_lemma_links(words_con)
+            # Links from an older deinflector release may be wrong guesses it no longer makes.
+            prev_params = previous_inputs.get("params") if isinstance(previous_inputs.get("params"), dict) else {}
+            prev_lemmatizer = str(prev_params.get("lemmatizer") or "")
+            deinflect_upgraded = prev_lemmatizer.startswith("deinflect:") and "lemmatizer" in changed_inputs
+            if cfg.phase2_lemmatizer == "deinflect" and (rebuild_lemmas or deinflect_upgraded or missing_lemmas):
+                _phase2_build_lemmas_deinflect(
+                    words_con,
+                    rebuild=rebuild_lemmas or deinflect_upgraded,
+                    wordlist_path=_phase2_deinflect_wordlist_path(root, cfg),
+                )
+            elif rebuild_lemmas or missing_lemmas:
+                _phase2_build_lemmas(words_con, rebuild=rebuild_lemmas)
+                # Anything still unlinked (no spaCy here, or cache misses we couldn't lemmatize)
+                # goes to the resident lemma worker if one is running, else to the one-shot
+                # external builder; a rebuild has already cleared the tables above.
+                if _count_missing_lemma_links(words_con):
+                    _phase2_build_lemmas_via_worker(words_con)
+                if _count_missing_lemma_links(words_con):
+                    words_con.commit()
+                    _run_external_lemma_builder(root, words_db_path=words_db_path, rebuild=False)
+            _sync_words_search(words_con)
+            _refresh_kanji_stats(words_con)
+            _refresh_word_growth(words_con)
+            # Only record the inputs once every lexeme is linked; otherwise the next run retries
+            # (e.g. after spaCy or the lemma venv gets installed). The deinflector always runs, so
+            # what it leaves unlinked is deliberate (ambiguous without a word list).
+            if cfg.phase2_lemmatizer == "deinflect" or not _count_missing_lemma_links(words_con):
+                _set_meta(words_con, "phase2_inputs", json.dumps(inputs, sort_keys=True))
+            words_con.commit()
+        finally:
+            words_con.close()
+    except Exception as e:
+        print(f"Phase 2 skipped due to error: {type(e).__name__}", file=sys.stderr)
+
+
 def _load_config(path: Path) -> Config:
     # Windows PowerShell's default "UTF8" encoding writes a BOM, which breaks json.loads
     # unless we decode with utf-8-sig.
@@ -549,6 +1424,10 @@ def _load_config(path: Path) -> Config:
 
     phase2 = raw.get("phase2") or {}
     phase2_csv_rule_id = str(phase2.get("csv_rule_id") or "default").strip() or "default"
+    phase2_lemmatizer = str(phase2.get("lemmatizer") or "spacy").strip().lower()
+    if phase2_lemmatizer not in ("spacy", "deinflect"):
+        raise ConfigError(f"phase2.lemmatizer must be 'spacy' or 'deinflect', got: {phase2_lemmatizer}")
+    phase2_deinflect_wordlist = str(phase2.get("deinflect_wordlist") or "").strip()
 
     anki_snapshot = raw.get("anki_snapshot") or {}
     anki_snapshot_enabled = bool(anki_snapshot.get("enabled", False))
@@ -571,6 +1450,8 @@ def _load_config(path: Path) -> Config:
         gsm_enabled=gsm_enabled,
         gsm_db_path=gsm_db_path,
         phase2_csv_rule_id=phase2_csv_rule_id,
+        phase2_lemmatizer=phase2_lemmatizer,
+        phase2_deinflect_wordlist=phase2_deinflect_wordlist,
         anki_snapshot_enabled=anki_snapshot_enabled,
         anki_snapshot_output_dir=anki_snapshot_output_dir,
     )
@@ -738,6 +1619,7 @@ def _ensure_schema(con: sqlite3.Connection) -> None:
           toggl_today_seconds INTEGER NOT NULL,
           toggl_today_breakdown_json TEXT NOT NULL,
           known_lemmas INTEGER NOT NULL,
+          known_lemmas_source TEXT NOT NULL DEFAULT 'surfaces',
           known_inflections INTEGER NOT NULL,
           manga_chars_total INTEGER NOT NULL,
           ttsu_chars_total INTEGER NOT NULL,
@@ -762,20 +1644,164 @@ def _ensure_schema(con: sqlite3.Connection) -> None:
         con.execute("ALTER TABLE snapshots ADD COLUMN warnings_json TEXT NOT NULL DEFAULT '[]';")
     if "tokei_surface_words" not in cols:
         con.execute("ALTER TABLE snapshots ADD COLUMN tokei_surface_words INTEGER NOT NULL DEFAULT 0;")
+    if "known_lemmas_source" not in cols:
+        # Older rows stored the distinct-surface count under known_lemmas.
+        con.execute("ALTER TABLE snapshots ADD COLUMN known_lemmas_source TEXT NOT NULL DEFAULT 'surfaces';")
+    if "lexeme_watermark" not in cols:
+        # MAX(lexemes.id) in tokei_words.sqlite when the report was built (new-words baseline).
+        con.execute("ALTER TABLE snapshots ADD COLUMN lexeme_watermark INTEGER;")
+    con.execute("CREATE INDEX IF NOT EXISTS idx_snapshots_report_day ON snapshots(report_day, run_id)")
 
 
-def _read_tokei_surface_words(root: Path) -> int:
+def _read_tokei_word_counts(root: Path) -> tuple[int, int]:
+    """Returns (distinct surfaces, distinct lemmas) from the Phase 2 counter table."""
     words_db = root / "cache" / "tokei_words.sqlite"
     if not words_db.exists():
-        return 0
+        return 0, 0
     con = sqlite3.connect(f"file:{words_db}?mode=ro", uri=True)
     try:
-        row = con.execute("SELECT COUNT(DISTINCT normalized_surface) FROM lexemes").fetchone()
-        return int(row[0] or 0) if row else 0
+        try:
+            counts = dict(con.execute("SELECT name, value FROM word_counters").fetchall())
+        except sqlite3.OperationalError:
+            # Database not yet touched by a Phase 2 that knows about the counters.
+            counts = {
+                "surfaces": con.execute("SELECT COUNT(DISTINCT normalized_surface) FROM lexemes").fetchone()[0],
+                "lemmas": con.execute("SELECT COUNT(DISTINCT lemma) FROM lemmas").fetchone()[0],
+            }
+        return int(counts.get("surfaces") or 0), int(counts.get("lemmas") or 0)
     except sqlite3.Error:
-        return 0
+        return 0, 0
+    finally:
+        con.close()
+
+
+def _read_tokei_word_growth(root: Path) -> dict[str, Any]:
+    """
+    Chart-ready known-word growth from the Phase 2 rollup: parallel per-day arrays (days with
+    no new words are omitted) for all rules combined plus each rule.
+    """
+    growth: dict[str, Any] = {"days": [], "new_words": [], "new_lemmas": [], "total_words": [], "total_lemmas": []}
+    words_db = root / "cache" / "tokei_words.sqlite"
+    if not words_db.exists():
+        return growth
+    con = sqlite3.connect(f"file:{words_db}?mode=ro", uri=True)
+    try:
+        rows = con.execute(
+            "SELECT day, rule_id, new_surfaces, new_lemmas FROM growth_daily ORDER BY day, rule_id"
+        ).fetchall()
+    except sqlite3.Error:
+        return growth
+    finally:
+        con.close()
+
+    by_rule: dict[str, dict[str, list[Any]]] = {}
+    total_words = 0
+    total_lemmas = 0
+    for day, rule_id, new_surfaces, new_lemmas in rows:
+        if rule_id:
+            series = by_rule.setdefault(str(rule_id), {"days": [], "new_words": [], "new_lemmas": []})
+            series["days"].append(str(day))
+            series["new_words"].append(int(new_surfaces))
+            series["new_lemmas"].append(int(new_lemmas))
+            continue
+        total_words += int(new_surfaces)
+        total_lemmas += int(new_lemmas)
+        growth["days"].append(str(day))
+        growth["new_words"].append(int(new_surfaces))
+        growth["new_lemmas"].append(int(new_lemmas))
+        growth["total_words"].append(total_words)
+        growth["total_lemmas"].append(total_lemmas)
+    growth["by_rule"] = by_rule
+    return growth
+
+
+# The report model lists this many; the side file has the full list.
+_NEW_WORDS_REPORT_CAP = 100
+
+
+def _read_tokei_new_words(
+    root: Path, *, since_day: str, after_lexeme_id: int | None
+) -> tuple[list[dict[str, Any]], int | None]:
+    """
+    Surfaces added to tokei_words.sqlite after the previous report, oldest first, plus the
+    current MAX(lexemes.id) to store as the next report's watermark. `after_lexeme_id` is the
+    previous report's watermark: a surface is new when one of its lexemes has a larger id and
+    none at or below it. Without a usable watermark (older reports, recreated words DB) it
+    falls back to first_seen after `since_day`, a range scan over idx_lexemes_first_seen
+    (pinned: the GROUP BY otherwise steers the planner into a full walk of the
+    normalized_surface index).
+    """
+    words_db = root / "cache" / "tokei_words.sqlite"
+    if not words_db.exists():
+        return [], None
+    con = sqlite3.connect(f"file:{words_db}?mode=ro", uri=True)
+    try:
+        max_id = con.execute("SELECT MAX(id) FROM lexemes").fetchone()[0]
+        max_id = int(max_id) if max_id is not None else None
+        if after_lexeme_id is not None and max_id is not None and max_id >= after_lexeme_id:
+            rows = con.execute(
+                """
+                SELECT l.normalized_surface, MIN(l.first_seen), GROUP_CONCAT(DISTINCT l.rule_id)
+                FROM lexemes l
+                WHERE l.id > ?
+                  AND NOT EXISTS (
+                    SELECT 1 FROM lexemes o
+                    WHERE o.normalized_surface = l.normalized_surface AND o.id <= ?
+                  )
+                GROUP BY l.normalized_surface
+                ORDER BY MIN(l.first_seen), l.normalized_surface
+                """,
+                (after_lexeme_id, after_lexeme_id),
+            ).fetchall()
+        else:
+            rows = con.execute(
+                """
+                SELECT l.normalized_surface, MIN(l.first_seen), GROUP_CONCAT(DISTINCT l.rule_id)
+                FROM lexemes l INDEXED BY idx_lexemes_first_seen
+                WHERE l.first_seen > ?
+                  AND NOT EXISTS (
+                    SELECT 1 FROM lexemes o
+                    WHERE o.normalized_surface = l.normalized_surface AND o.first_seen <= ?
+                  )
+                GROUP BY l.normalized_surface
+                ORDER BY MIN(l.first_seen), l.normalized_surface
+                """,
+                (since_day, since_day),
+            ).fetchall()
+    except sqlite3.Error:
+        return [], None
     finally:
         con.close()
+    words = [
+        {"surface": str(surface), "first_seen": str(first_seen), "rule_ids": sorted(str(rule_ids or "").split(","))}
+        for surface, first_seen, rule_ids in rows
+    ]
+    return words, max_id
+
+
+def _read_tokei_kanji(root: Path) -> tuple[int, dict[str, Any]]:
+    """Returns (known kanji count, per-day growth arrays) from kanji_stats."""
+    growth: dict[str, Any] = {"days": [], "new_kanji": [], "total_kanji": []}
+    words_db = root / "cache" / "tokei_words.sqlite"
+    if not words_db.exists():
+        return 0, growth
+    con = sqlite3.connect(f"file:{words_db}?mode=ro", uri=True)
+    try:
+        rows = con.execute(
+            "SELECT first_seen, COUNT(*) FROM kanji_stats GROUP BY first_seen ORDER BY first_seen"
+        ).fetchall()
+    except sqlite3.Error:
+        return 0, growth
+    finally:
+        con.close()
+
+    total = 0
+    for day, n in rows:
+        total += int(n)
+        growth["days"].append(str(day))
+        growth["new_kanji"].append(int(n))
+        growth["total_kanji"].append(total)
+    return total, growth
 
 
 def _get_meta(con: sqlite3.Connection, key: str) -> str | None:
@@ -1405,6 +2431,7 @@ def _build_report_model(
     avg_immersion_seconds: int,
     avg_immersion_delta_seconds: int,
     known_words_delta: int,
+    known_lemmas_delta: int,
     known_inflections_delta: int,
     manga_chars_total: int,
     manga_chars_delta: int,
@@ -1412,6 +2439,12 @@ def _build_report_model(
     ttsu_chars_delta: int,
     gsm_chars_total: int,
     gsm_chars_delta: int,
+    known_words_growth: dict[str, Any],
+    known_kanji: int,
+    known_kanji_growth: dict[str, Any],
+    new_words: list[dict[str, Any]],
+    new_words_since: str | None,
+    new_words_path: Path,
 ) -> dict[str, Any]:
     reading_enabled = bool(cfg.mokuro_enabled or cfg.ttsu_enabled or cfg.gsm_enabled)
     return {
@@ -1429,10 +2462,19 @@ def _build_report_model(
         "known_words": int(tokei_surface_words),
         "known_words_delta": known_words_delta,
         "known_lemmas": int(known_lemmas),
-        "known_lemmas_delta": int(known_words_delta),
+        "known_lemmas_delta": int(known_lemmas_delta),
         "known_inflections": known_inflections,
         "known_inflections_delta": known_inflections_delta,
         "tokei_surface_words": int(tokei_surface_words),
+        "known_words_growth": known_words_growth,
+        "known_kanji": int(known_kanji),
+        "known_kanji_growth": known_kanji_growth,
+        "new_words": {
+            "since": new_words_since,
+            "total": len(new_words),
+            "items": new_words[:_NEW_WORDS_REPORT_CAP],
+            "path": str(new_words_path),
+        },
         "today_immersion": {
             "total_seconds": int(today_seconds),
             "entries": today_breakdown,
@@ -1525,6 +2567,281 @@ def _compute_immersion_windows(
     return log, cur_avg, delta
 
 
+# Metrics answered by `--query`, mapped to the snapshots column that records them.
+# `lifetime_hours` and `day_hours` come from toggl_daily instead (see _query_toggl_series).
+_QUERY_SNAPSHOT_METRICS: dict[str, str] = {
+    "known_words": "tokei_surface_words",
+    "known_lemmas": "known_lemmas",
+    "known_inflections": "known_inflections",
+    "manga_chars": "manga_chars_total",
+    "ttsu_chars": "ttsu_chars_total",
+    "gsm_chars": "gsm_chars_total",
+    "anki_total_reviews": "anki_total_reviews",
+    "anki_true_retention": "anki_true_retention",
+}
+_QUERY_METRICS: tuple[str, ...] = (
+    "lifetime_hours",
+    "day_hours",
+    *_QUERY_SNAPSHOT_METRICS.keys(),
+    "reading_chars",
+    "report_no",
+)
+
+
+def _parse_query_spec(tokens: list[str]) -> tuple[date, date, list[str]]:
+    """
+    Parse `as-of=DATE [METRIC ...]` (or `as-of=FROM..TO`) into (from_day, to_day, metrics).
+    """
+    if not tokens:
+        raise ConfigError("--query requires as-of=DATE or as-of=FROM..TO.")
+    head = str(tokens[0]).strip()
+    key, sep, value = head.partition("=")
+    if not sep or key.strip().lower() not in ("as-of", "as_of", "asof"):
+        raise ConfigError(f"--query expects as-of=DATE as its first argument, got: {head}")
+
+    value = value.strip()
+    try:
+        if ".." in value:
+            a, b = value.split("..", 1)
+            from_day = date.fromisoformat(a.strip())
+            to_day = date.fromisoformat(b.strip())
+        else:
+            from_day = to_day = date.fromisoformat(value)
+    except ValueError as e:
+        raise ConfigError(f"--query has an invalid date: {value} ({e})") from e
+    if to_day < from_day:
+        raise ConfigError(f"--query range is reversed: {value}")
+
+    metrics: list[str] = []
+    for tok in tokens[1:]:
+        for name in str(tok).split(","):
+            name = name.strip().lower().replace("-", "_")
+            if not name:
+                continue
+            if name not in _QUERY_METRICS:
+                raise ConfigError(f"Unknown --query metric: {name} (known: {', '.join(_QUERY_METRICS)})")
+            if name not in metrics:
+                metrics.append(name)
+    return from_day, to_day, (metrics or list(_QUERY_METRICS))
+
+
+def _query_toggl_series(con: sqlite3.Connection, from_day: date, to_day: date) -> dict[date, tuple[int, int]]:
+    """
+    Return {day: (lifetime_seconds, day_seconds)} for every day in [from_day, to_day].
+
+    Lifetime uses the same formula as the report (baseline + toggl_daily from the cache start),
+    so it only reads the primary-key range of toggl_daily plus one prefix SUM.
+    """
+    baseline_raw = _get_meta(con, "toggl_baseline_seconds")
+    try:
+        baseline = int(baseline_raw or 0)
+    except ValueError:
+        baseline = 0
+
+    sum_start_raw = _get_meta(con, "toggl_start_date") or "1970-01-01"
+    if sum_start_raw == "1970-01-01":
+        sum_start_raw = _get_meta(con, "toggl_cache_start_day") or sum_start_raw
+
+    running = int(
+        con.execute(
+            "SELECT COALESCE(SUM(total_seconds), 0) FROM toggl_daily WHERE day >= ? AND day < ?",
+            (sum_start_raw, from_day.isoformat()),
+        ).fetchone()[0]
+        or 0
+    )
+    rows = con.execute(
+        """
+        SELECT day, total_seconds
+        FROM toggl_daily
+        WHERE day >= ? AND day <= ?
+        """,
+        (from_day.isoformat(), to_day.isoformat()),
+    ).fetchall()
+    seconds_by_day = {str(d): int(s or 0) for (d, s) in rows}
+
+    out: dict[date, tuple[int, int]] = {}
+    cursor = from_day
+    while cursor <= to_day:
+        day_s = cursor.isoformat()
+        day_seconds = seconds_by_day.get(day_s, 0)
+        if day_s >= sum_start_raw:
+            running += day_seconds
+        out[cursor] = (baseline + running, day_seconds)
+        cursor += timedelta(days=1)
+    return out
+
+
+def _query_snapshot_series(
+    con: sqlite3.Connection, from_day: date, to_day: date
+) -> dict[date, dict[str, Any] | None]:
+    """
+    Return the latest report snapshot as of each day in [from_day, to_day] (None before the first report).
+    """
+    cols = ["run_id", "report_day", *_QUERY_SNAPSHOT_METRICS.values()]
+    select = ", ".join(cols)
+    as_of_row = con.execute(
+        f"""
+        SELECT {select}
+        FROM snapshots
+        WHERE report_day <= ?
+        ORDER BY report_day DESC, run_id DESC
+        LIMIT 1
+        """,
+        (from_day.isoformat(),),
+    ).fetchone()
+    later_rows = con.execute(
+        f"""
+        SELECT {select}
+        FROM snapshots
+        WHERE report_day > ? AND report_day <= ?
+        ORDER BY report_day, run_id
+        """,
+        (from_day.isoformat(), to_day.isoformat()),
+    ).fetchall()
+
+    by_day: dict[str, dict[str, Any]] = {}
+    for row in later_rows:
+        rec = dict(zip(cols, row))
+        by_day[str(rec["report_day"])] = rec  # last run of the day wins
+
+    current = dict(zip(cols, as_of_row)) if as_of_row else None
+    out: dict[date, dict[str, Any] | None] = {}
+    cursor = from_day
+    while cursor <= to_day:
+        current = by_day.get(cursor.isoformat(), current)
+        out[cursor] = current
+        cursor += timedelta(days=1)
+    return out
+
+
+_SEARCH_DEFAULT_LIMIT = 50
+
+
+def _search_words(words_db_path: Path, text: str, *, limit: int = _SEARCH_DEFAULT_LIMIT) -> dict[str, Any]:
+    """
+    Answer `--search TEXT` ("do I know this word?"): substring matches over known surfaces
+    and lemmas, or prefix matches for `TEXT*`. Exact matches sort first, then shorter ones.
+    """
+    prefix = text.endswith("*")
+    q = _normalize_surface_for_identity(text.rstrip("*"))
+    result: dict[str, Any] = {"query": q, "mode": "prefix" if prefix else "substring", "lexemes": [], "lemmas": []}
+    if not q:
+        return result
+    if not words_db_path.exists():
+        raise ConfigError(f"No known-word database found at: {words_db_path} (run Tokei at least once).")
+
+    # Index rows still queued for the FTS tables (e.g. lemmas written by tokei_phase2_lemmas.py
+    # outside a sync) so they are searchable; a no-op when the queue is empty.
+    con = sqlite3.connect(str(words_db_path))
+    try:
+        _sync_words_search(con)
+        con.commit()
+    finally:
+        con.close()
+
+    con = sqlite3.connect(f"file:{words_db_path}?mode=ro", uri=True)
+    try:
+        has_fts = con.execute("SELECT 1 FROM sqlite_master WHERE name='lexeme_fts'").fetchone() is not None
+        for kind, table, column, fts in (
+            ("lexemes", "lexemes", "normalized_surface", "lexeme_fts"),
+            ("lemmas", "lemmas", "lemma", "lemma_fts"),
+        ):
+            if prefix:
+                # Range scan on the column's index (U+10FFFF sorts after any continuation).
+                where = f"t.{column} >= ? AND t.{column} < ?"
+                params: tuple[Any, ...] = (q, q + "\U0010ffff")
+                source = f"{table} t"
+            elif has_fts and len(q) >= 3:
+                # Trigrams need at least 3 characters; shorter substrings use the LIKE scan below.
+                where = f"{fts} MATCH ?"
+                params = ('"' + q.replace('"', '""') + '"',)
+                source = f"{fts} JOIN {table} t ON t.id = {fts}.rowid"
+            else:
+                where = f"t.{column} LIKE ? ESCAPE '\\'"
+                params = ("%" + re.sub(r"([%_\\])", r"\\\1", q) + "%",)
+                source = f"{table} t"
+
+            if kind == "lexemes":
+                select = "t.normalized_surface, t.rule_id, t.first_seen, t.last_seen"
+            else:
+                select = """
+                    t.lemma, t.rule_id,
+                    (SELECT MIN(l.first_seen) FROM lexeme_lemmas ll JOIN lexemes l ON l.id = ll.lexeme_id
+                     WHERE ll.lemma_id = t.id),
+                    (SELECT MAX(l.last_seen) FROM lexeme_lemmas ll JOIN lexemes l ON l.id = ll.lexeme_id
+                     WHERE ll.lemma_id = t.id)
+                """
+            rows = con.execute(
+                f"""
+                SELECT {select}
+                FROM {source}
+                WHERE {where}
+                ORDER BY t.{column} != ?, length(t.{column}), t.{column}, t.rule_id
+                LIMIT ?
+                """,
+                (*params, q, int(limit)),
+            ).fetchall()
+            result[kind] = [
+                {"text": str(t), "rule_id": str(rid), "first_seen": first, "last_seen": last}
+                for (t, rid, first, last) in rows
+            ]
+    finally:
+        con.close()
+    return result
+
+
+def _run_query(db_path: Path, tokens: list[str]) -> dict[str, Any]:
+    """
+    Answer `--query as-of=DATE [METRIC ...]` from the report cache without syncing anything.
+    """
+    from_day, to_day, metrics = _parse_query_spec(tokens)
+    if not db_path.exists():
+        raise ConfigError(f"No Tokei cache found at: {db_path} (run Tokei at least once).")
+
+    con = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        toggl = _query_toggl_series(con, from_day, to_day)
+        snaps = _query_snapshot_series(con, from_day, to_day)
+    finally:
+        con.close()
+
+    series: list[dict[str, Any]] = []
+    cursor = from_day
+    while cursor <= to_day:
+        lifetime_s, day_s = toggl[cursor]
+        snap = snaps[cursor]
+        point: dict[str, Any] = {"day": cursor.isoformat()}
+        for m in metrics:
+            if m == "lifetime_hours":
+                point[m] = round(lifetime_s / 3600.0, 4)
+            elif m == "day_hours":
+                point[m] = round(day_s / 3600.0, 4)
+            elif snap is None:
+                point[m] = None
+            elif m == "reading_chars":
+                point[m] = int(
+                    (snap["manga_chars_total"] or 0) + (snap["ttsu_chars_total"] or 0) + (snap["gsm_chars_total"] or 0)
+                )
+            elif m == "report_no":
+                point[m] = int(snap["run_id"])
+            elif m == "anki_true_retention":
+                point[m] = float(snap[_QUERY_SNAPSHOT_METRICS[m]] or 0.0)
+            else:
+                point[m] = int(snap[_QUERY_SNAPSHOT_METRICS[m]] or 0)
+        series.append(point)
+        cursor += timedelta(days=1)
+
+    if from_day == to_day:
+        return {"status": "ok", "as_of": from_day.isoformat(), "metrics": {k: v for k, v in series[0].items() if k != "day"}}
+    return {
+        "status": "ok",
+        "from": from_day.isoformat(),
+        "to": to_day.isoformat(),
+        "metrics": metrics,
+        "series": series,
+    }
+
+
 def main(argv: list[str]) -> int:
     import argparse
 
@@ -1548,30 +2865,30 @@ def main(argv: list[str]) -> int:
     parser.add_argument(
         "--rebuild-lemmas",
         action="store_true",
-        help="Clear derived lemma tables and rebuild them from lexeme surfaces.",
+        help="Clear derived lemma tables and rebuild them from lexeme surfaces (checkpointed; an interrupted rebuild resumes on the next run).",
     )
     parser.add_argument(
         "--phase2-only",
         action="store_true",
         help="Run Phase 2 (lexemes/lemmas/CSV) only and exit without generating a report.",
     )
+    parser.add_argument(
+        "--query",
+        nargs="+",
+        metavar="SPEC",
+        help="Read-only lookup from the cache: as-of=DATE (or as-of=FROM..TO) followed by optional metric names. Prints JSON.",
+    )
+    parser.add_argument(
+        "--search",
+        metavar="TEXT",
+        help="Search known words/lemmas (substring; TEXT* for prefix) in tokei_words.sqlite. Prints JSON.",
+    )
     args = parser.parse_args(argv[1:])
 
     if args.sync_only and args.no_sync:
         raise ConfigError("--sync-only and --no-sync are mutually exclusive.")
 
-    env_root = os.environ.get("TOKEI_USER_ROOT")
-    if env_root:
-        root = Path(env_root).resolve()
-    else:
-        appdata = os.environ.get("APPDATA") or ""
-        appdata_root = (Path(appdata) / "Tokei") if appdata else None
-        # Only default to %APPDATA%\Tokei when it's already been set up (config exists),
-        # so running from source remains portable by default.
-        if appdata_root and (appdata_root / "config.json").exists():
-            root = appdata_root
-        else:
-            root = Path(__file__).resolve().parents[1]
+    root = get_user_root()
     config_path = root / "config.json"
     cache_dir = root / "cache"
     cache_dir.mkdir(parents=True, exist_ok=True)
@@ -1579,6 +2896,15 @@ def main(argv: list[str]) -> int:
     out_stats_path = cache_dir / "latest_stats.json"
     out_sync_path = cache_dir / "latest_sync.json"
 
+    if args.query:
+        result = _run_query(db_path, list(args.query))
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+        return 0
+    if args.search is not None:
+        result = _search_words(cache_dir / "tokei_words.sqlite", args.search)
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+        return 0
+
     cfg = _load_config(config_path)
 
     local_tz = datetime.now().astimezone().tzinfo
@@ -1600,57 +2926,31 @@ def main(argv: list[str]) -> int:
                 tz = local_tz
 
     # Phase 2: derived lemma system (idempotent, does not affect report JSON behavior).
-    try:
-        today_for_phase2 = datetime.now(tz).date()
-        words_db_path = cache_dir / "tokei_words.sqlite"
-        words_con = sqlite3.connect(str(words_db_path))
-        try:
-            words_con.execute("PRAGMA journal_mode=DELETE;")
-            words_con.execute("PRAGMA synchronous=NORMAL;")
-            _ensure_words_schema(words_con)
-            _phase2_import_hashi_lexemes(words_con, cfg=cfg, today=today_for_phase2)
-            _phase2_ingest_known_csv(
-                words_con,
-                root=root,
-                today=today_for_phase2,
-                rule_id=cfg.phase2_csv_rule_id,
-            )
-
-            missing_lemmas = int(
-                words_con.execute(
-                    """
-                    SELECT COUNT(*)
-                    FROM lexemes l
-                    LEFT JOIN lexeme_lemmas ll ON ll.lexeme_id = l.id
-                    WHERE ll.lexeme_id IS NULL
-                    """
-                ).fetchone()[0]
-                or 0
-            )
-            if args.rebuild_lemmas or missing_lemmas:
-                linked = _phase2_build_lemmas(words_con, rebuild=bool(args.rebuild_lemmas))
-                if linked == 0 and (args.rebuild_lemmas or missing_lemmas):
-                    words_con.commit()
-                    _run_external_lemma_builder(
-                        root, words_db_path=words_db_path, rebuild=bool(args.rebuild_lemmas)
-                    )
-            words_con.commit()
-        finally:
-            words_con.close()
-    except Exception as e:
-        print(f"Phase 2 skipped due to error: {type(e).__name__}", file=sys.stderr)
-
+    # It runs on a worker thread so the spaCy model load overlaps the Toggl fetch and source
+    # reads below; it is joined before anything reads tokei_words.sqlite.
+    phase2_kwargs: dict[str, Any] = {
+        "root": root,
+        "cache_dir": cache_dir,
+        "cfg": cfg,
+        "tz": tz,
+        "rebuild_lemmas": bool(args.rebuild_lemmas),
+    }
     if args.phase2_only:
+        _run_phase2(**phase2_kwargs)
         return 0
-
-    api_token: str | None = None
-    if not args.no_sync:
-        api_token = _get_api_token(root)
-        # Ensure token works and /me is reachable (user requested /me usage).
-        _fetch_json("https://api.track.toggl.com/api/v9/me", api_token)
+    phase2_worker = threading.Thread(target=_run_phase2, kwargs=phase2_kwargs, name="tokei-phase2")
 
     con = sqlite3.connect(str(db_path))
+    # Everything after start() runs under the try below, so every return or error path joins
+    # the worker (in the finally) before the process tears down.
+    phase2_worker.start()
     try:
+        api_token: str | None = None
+        if not args.no_sync:
+            api_token = _get_api_token(root)
+            # Ensure token works and /me is reachable (user requested /me usage).
+            _fetch_json("https://api.track.toggl.com/api/v9/me", api_token)
+
         con.execute("PRAGMA journal_mode=DELETE;")
         con.execute("PRAGMA synchronous=NORMAL;")
         _ensure_schema(con)
@@ -1759,6 +3059,7 @@ def main(argv: list[str]) -> int:
 
             tokei_surface_words = _int_summary("tokei_surface_words")
             known_lemmas = _int_summary("known_lemmas")
+            known_lemmas_source = str(summary.get("known_lemmas_source") or "surfaces")
             known_inflections = _int_summary("known_inflections")
             manga_chars_total = _int_summary("manga_chars_total")
             ttsu_chars_total = _int_summary("ttsu_chars_total")
@@ -1795,8 +3096,13 @@ def main(argv: list[str]) -> int:
                 {"desc": str(desc), "seconds": int(sec or 0)} for (desc, sec) in breakdown_rows
             ]
 
-            tokei_surface_words = _read_tokei_surface_words(root)
-            known_lemmas = int(tokei_surface_words)
+            phase2_worker.join()
+            tokei_surface_words, known_lemmas = _read_tokei_word_counts(root)
+            known_lemmas_source = "lemmas"
+            if not known_lemmas:
+                # No lemmatizer has run yet; keep reporting surfaces rather than a zero.
+                known_lemmas = int(tokei_surface_words)
+                known_lemmas_source = "surfaces"
             known_inflections = int(tokei_surface_words)
             manga_chars_total = _read_mokuro_manga_chars(cfg, warnings=warnings) if cfg.mokuro_enabled else 0
             ttsu_chars_total = _read_ttsu_chars(cfg, warnings=warnings) if cfg.ttsu_enabled else 0
@@ -1811,7 +3117,8 @@ def main(argv: list[str]) -> int:
             prev = con.execute(
                 """
                 SELECT toggl_lifetime_seconds, known_lemmas, known_inflections, manga_chars_total, ttsu_chars_total, gsm_chars_total,
-                       anki_total_reviews, anki_true_retention, tokei_surface_words
+                       anki_total_reviews, anki_true_retention, tokei_surface_words, report_day, known_lemmas_source,
+                       lexeme_watermark
                 FROM snapshots
                 WHERE run_id < ?
                 ORDER BY run_id DESC
@@ -1823,7 +3130,8 @@ def main(argv: list[str]) -> int:
             prev = con.execute(
                 """
                 SELECT toggl_lifetime_seconds, known_lemmas, known_inflections, manga_chars_total, ttsu_chars_total, gsm_chars_total,
-                       anki_total_reviews, anki_true_retention, tokei_surface_words
+                       anki_total_reviews, anki_true_retention, tokei_surface_words, report_day, known_lemmas_source,
+                       lexeme_watermark
                 FROM snapshots
                 ORDER BY run_id DESC
                 LIMIT 1
@@ -1839,6 +3147,9 @@ def main(argv: list[str]) -> int:
         prev_anki_total = int(prev[6]) if prev else anki_total
         prev_retention_rate = (float(prev[7]) * 100.0) if prev else (anki_true_retention * 100.0)
         prev_tokei_surface_words = int(prev[8]) if prev else tokei_surface_words
+        prev_report_day = str(prev[9]) if prev and prev[9] else None
+        prev_known_lemmas_source = str(prev[10]) if prev else known_lemmas_source
+        prev_lexeme_watermark = int(prev[11]) if prev and prev[11] is not None else None
 
         # For Sync (sync-only), prefer comparing against the previous sync snapshot rather than the
         # previous report snapshot. Otherwise, if you haven't generated a report in a while, the
@@ -1862,6 +3173,7 @@ def main(argv: list[str]) -> int:
 
                     prev_tokei_surface_words = _prev_int("tokei_surface_words", prev_tokei_surface_words)
                     prev_known_lemmas = _prev_int("known_lemmas", prev_known_lemmas)
+                    prev_known_lemmas_source = str(prev_summary.get("known_lemmas_source") or "surfaces")
                     prev_known_inflections = _prev_int("known_inflections", prev_known_inflections)
                     prev_manga_chars = _prev_int("manga_chars_total", prev_manga_chars)
                     prev_ttsu_chars = _prev_int("ttsu_chars_total", prev_ttsu_chars)
@@ -1878,6 +3190,11 @@ def main(argv: list[str]) -> int:
 
         anki_total_delta = int(anki_total - prev_anki_total)
         known_words_delta = int(tokei_surface_words - prev_tokei_surface_words)
+        if prev_known_lemmas_source != known_lemmas_source:
+            # A surface count (no lemmatizer yet, or a report from before lemma counters) is not
+            # comparable with a lemma count: treat the previous value as missing.
+            prev_known_lemmas = known_lemmas
+        known_lemmas_delta = int(known_lemmas - prev_known_lemmas)
         known_inflections_delta = int(known_inflections - prev_known_inflections)
         manga_chars_delta = int(manga_chars_total - prev_manga_chars)
         ttsu_chars_delta = int(ttsu_chars_total - prev_ttsu_chars)
@@ -1913,8 +3230,10 @@ def main(argv: list[str]) -> int:
                     "immersion_7d_avg_delta_hours": round(float(avg_delta_seconds) / 3600.0, 4),
                     "tokei_surface_words": int(tokei_surface_words),
                     "known_lemmas": int(known_lemmas),
+                    "known_lemmas_source": known_lemmas_source,
                     "known_inflections": int(known_inflections),
                     "known_words_delta": int(known_words_delta),
+                    "known_lemmas_delta": int(known_lemmas_delta),
                     "known_inflections_delta": int(known_inflections_delta),
                     "manga_chars_total": int(manga_chars_total),
                     "manga_chars_delta": int(manga_chars_delta),
@@ -1959,6 +3278,7 @@ def main(argv: list[str]) -> int:
                     toggl_today_seconds=?,
                     toggl_today_breakdown_json=?,
                     known_lemmas=?,
+                    known_lemmas_source=?,
                     known_inflections=?,
                     tokei_surface_words=?,
                     manga_chars_total=?,
@@ -1979,6 +3299,7 @@ def main(argv: list[str]) -> int:
                     int(today_seconds),
                     json.dumps(today_breakdown, ensure_ascii=False),
                     int(known_lemmas),
+                    known_lemmas_source,
                     int(known_inflections),
                     int(tokei_surface_words),
                     int(manga_chars_total),
@@ -1997,10 +3318,10 @@ def main(argv: list[str]) -> int:
                 INSERT INTO snapshots(
                   generated_at, report_day, timezone, theme,
                   toggl_lifetime_seconds, toggl_today_seconds, toggl_today_breakdown_json,
-                  known_lemmas, known_inflections, tokei_surface_words, manga_chars_total, ttsu_chars_total, gsm_chars_total,
-                  anki_total_reviews, anki_reviews, anki_true_retention, warnings_json
+                  known_lemmas, known_lemmas_source, known_inflections, tokei_surface_words, manga_chars_total,
+                  ttsu_chars_total, gsm_chars_total, anki_total_reviews, anki_reviews, anki_true_retention, warnings_json
                 )
-                VALUES(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                VALUES(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                 """,
                 (
                     now.isoformat(),
@@ -2011,6 +3332,7 @@ def main(argv: list[str]) -> int:
                     int(today_seconds),
                     json.dumps(today_breakdown, ensure_ascii=False),
                     int(known_lemmas),
+                    known_lemmas_source,
                     int(known_inflections),
                     int(tokei_surface_words),
                     int(manga_chars_total),
@@ -2027,6 +3349,25 @@ def main(argv: list[str]) -> int:
             run_id = int(cur.lastrowid)
         con.commit()
 
+        # --no-sync skips the join above; the growth series is read from tokei_words.sqlite.
+        phase2_worker.join()
+        known_kanji, known_kanji_growth = _read_tokei_kanji(root)
+        new_words, lexeme_watermark = _read_tokei_new_words(
+            root, since_day=prev_report_day or "", after_lexeme_id=prev_lexeme_watermark
+        )
+        if not prev_report_day:
+            new_words = []
+        con.execute("UPDATE snapshots SET lexeme_watermark=? WHERE run_id=?", (lexeme_watermark, run_id))
+        con.commit()
+        new_words_path = cache_dir / "latest_new_words.json"
+        new_words_path.write_text(
+            json.dumps(
+                {"report_no": run_id, "since": prev_report_day, "total": len(new_words), "words": new_words},
+                ensure_ascii=False,
+                indent=2,
+            ),
+            encoding="utf-8",
+        )
         model = _build_report_model(
             cfg=cfg,
             run_id=run_id,
@@ -2047,6 +3388,7 @@ def main(argv: list[str]) -> int:
             avg_immersion_seconds=avg_seconds,
             avg_immersion_delta_seconds=avg_delta_seconds,
             known_words_delta=known_words_delta,
+            known_lemmas_delta=known_lemmas_delta,
             known_inflections_delta=known_inflections_delta,
             manga_chars_total=manga_chars_total,
             manga_chars_delta=manga_chars_delta,
@@ -2054,6 +3396,12 @@ def main(argv: list[str]) -> int:
             ttsu_chars_delta=ttsu_chars_delta,
             gsm_chars_total=gsm_chars_total,
             gsm_chars_delta=gsm_chars_delta,
+            known_words_growth=_read_tokei_word_growth(root),
+            known_kanji=known_kanji,
+            known_kanji_growth=known_kanji_growth,
+            new_words=new_words,
+            new_words_since=prev_report_day,
+            new_words_path=new_words_path,
         )
 
         out_stats_path.write_text(json.dumps(model, ensure_ascii=False, indent=2), encoding="utf-8")
@@ -2061,6 +3409,7 @@ def main(argv: list[str]) -> int:
         return 0
     finally:
         con.close()
+        phase2_worker.join()
 
 
 if __name__ == "__main__":  # pragma: no cover
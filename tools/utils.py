@@ -21,3 +21,16 @@ def get_gsm_path():
     elif os_name == 'Linux':
         appdata = str(Path('~/.config').expanduser())
     return appdata
+
+
+def get_user_root():
+    # Tokei's user root (config.json, cache/): TOKEI_USER_ROOT, else %APPDATA%\Tokei once it has
+    # been set up (config exists), else the app folder so running from source stays portable.
+    env_root = os.environ.get('TOKEI_USER_ROOT')
+    if env_root:
+        return Path(env_root).resolve()
+    appdata = os.environ.get('APPDATA') or ''
+    appdata_root = (Path(appdata) / 'Tokei') if appdata else None
+    if appdata_root and (appdata_root / 'config.json').exists():
+        return appdata_root
+    return Path(__file__).resolve().parents[1]